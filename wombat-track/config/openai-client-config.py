@@ -4,12 +4,24 @@ OpenAI Client Configuration for oApp Integration
 Direct integration with OF Integration Service
 """
 
-import openai
 import requests
-from typing import Dict, Any, Optional
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional
+import atexit
+import hashlib
 import json
+import os
+import queue
+import threading
 import time
 
+try:
+    import diskcache
+except ImportError:
+    diskcache = None
+
 class OpenAIoAppClient:
     """
     OpenAI client configured for direct oApp integration
@@ -19,34 +31,118 @@ class OpenAIoAppClient:
     def __init__(self, 
                  integration_service_url: str = "http://localhost:3001",
                  use_azure_auth: bool = False,
-                 azure_token: Optional[str] = None):
+                 azure_token: Optional[str] = None,
+                 cache_ttl: float = 24 * 60 * 60,
+                 cache_dir: str = "~/.wt_openai_cache",
+                 cache_maxsize: int = 1024,
+                 health_ttl: float = 5,
+                 log_batch_size: int = 50,
+                 request_timeout: float = 10,
+                 close_timeout: float = 15):
         
         self.integration_service_url = integration_service_url
         self.use_azure_auth = use_azure_auth
         self.azure_token = azure_token
         
-        # Configure OpenAI client to use our integration service
+        # Every request is bounded so a stalled service can't hang callers or
+        # interpreter exit (close() waits for the log worker's last POST)
+        self.request_timeout = request_timeout
+        self.close_timeout = close_timeout
+        
+        # Answer cache: in-process tier, persisted across runs when diskcache is installed
+        self.cache_ttl = cache_ttl
+        self.cache_maxsize = cache_maxsize
+        self._cache: Dict[str, Any] = {}
+        self._cache_lock = threading.Lock()
+        self._disk_cache = diskcache.Cache(os.path.expanduser(cache_dir)) if diskcache else None
+        
+        # Health probes are memoized briefly so pollers and dashboards don't hammer /health
+        self.health_ttl = health_ttl
+        self._health_cache: Dict[str, Any] = {}
+        
+        # Pooled keep-alive session shared by every call to the integration service
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=20,
+            pool_maxsize=100,
+            max_retries=Retry(total=3, backoff_factor=0.2)
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            'Content-Type': 'application/json',
+            'User-Agent': 'OpenAI-oApp-Client/1.0'
+        })
+        
         if use_azure_auth and azure_token:
-            openai.api_key = azure_token
-            openai.api_base = integration_service_url
-            openai.api_type = "azure"
-        else:
-            # Local testing mode - direct HTTP calls
-            self.session = requests.Session()
-            self.session.headers.update({
-                'Content-Type': 'application/json',
-                'User-Agent': 'OpenAI-oApp-Client/1.0'
-            })
+            self.session.headers['Authorization'] = f"Bearer {azure_token}"
+        
+        # Governance entries are posted in batches by a background worker so logging never blocks callers
+        self.log_batch_size = log_batch_size
+        self.log_failures: List[Dict[str, Any]] = []
+        self._log_failures_seen = 0
+        self._log_pending = 0  # Queued or in-flight entries, reported if close() gives up on them
+        self._log_lock = threading.Lock()
+        self._log_queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+        self._log_worker = threading.Thread(target=self._drain_log_queue, daemon=True)
+        self._log_worker.start()
+        self._closed = False
+        atexit.register(self.close)
             
         print(f"✅ OpenAI oApp Client configured")
         print(f"   Integration Service: {integration_service_url}")
         print(f"   Azure Auth: {'Enabled' if use_azure_auth else 'Disabled (local testing)'}")
     
+    def _cache_key(self, kind: str, **params: Any) -> str:
+        """Stable key for a query, normalizing whitespace and case in string params"""
+        normalized = {
+            key: " ".join(value.split()).lower() if isinstance(value, str) else value
+            for key, value in params.items()
+        }
+        payload = json.dumps(
+            {"kind": kind, "service": self.integration_service_url, **normalized},
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+    
+    def _cache_get(self, key: str) -> Optional[Any]:
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.time():
+                    return value
+                self._cache.pop(key, None)
+        
+        if self._disk_cache is not None:
+            # Promote with the entry's original deadline so a disk hit doesn't extend its life
+            value, expires_at = self._disk_cache.get(key, expire_time=True)
+            if value is not None:
+                self._cache_store(key, value, expires_at or time.time() + self.cache_ttl)
+            return value
+        
+        return None
+    
+    def _cache_set(self, key: str, value: Any) -> None:
+        self._cache_store(key, value, time.time() + self.cache_ttl)
+        
+        if self._disk_cache is not None:
+            self._disk_cache.set(key, value, expire=self.cache_ttl)
+    
+    def _cache_store(self, key: str, value: Any, expires_at: float) -> None:
+        # ask_question may run on several threads at once (see the demo), so guard the dict
+        with self._cache_lock:
+            if key not in self._cache and len(self._cache) >= self.cache_maxsize:
+                # Dicts keep insertion order, so this evicts the oldest entry
+                self._cache.pop(next(iter(self._cache)), None)
+            self._cache[key] = (expires_at, value)
+    
     def query_codebase(self, 
                       query_text: str, 
                       pattern: Optional[str] = None, 
                       directory: str = ".",
-                      limit: int = 10) -> Dict[str, Any]:
+                      limit: int = 10,
+                      use_cache: bool = True) -> Dict[str, Any]:
         """
         Query the local codebase directly through the integration service
         
@@ -55,16 +151,31 @@ class OpenAIoAppClient:
             pattern: Optional search pattern for files
             directory: Directory to search in
             limit: Maximum number of results
+            use_cache: Serve repeated queries from the answer cache
             
         Returns:
             Query results with file paths and relevant information
         """
         
+        cache_key = self._cache_key(
+            "query_codebase",
+            query_text=query_text,
+            pattern=pattern,
+            directory=directory,
+            limit=limit
+        )
+        if use_cache:
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                # The cache holds the payload only; stamp each answer when it is served
+                return {**cached, "timestamp": time.time()}
+        
         # First get codebase files matching the pattern
         if pattern:
             codebase_response = self.session.get(
                 f"{self.integration_service_url}/api/codebase/query",
-                params={"pattern": pattern, "directory": directory, "limit": limit}
+                params={"pattern": pattern, "directory": directory, "limit": limit},
+                timeout=self.request_timeout
             )
             codebase_results = codebase_response.json() if codebase_response.status_code == 200 else {}
         else:
@@ -77,12 +188,13 @@ class OpenAIoAppClient:
                 "query": f"{query_text} {f'(related to: {pattern})' if pattern else ''}",
                 "scope": "combined",
                 "priority": "medium"
-            }
+            },
+            timeout=self.request_timeout
         )
         
         memory_results = memory_response.json() if memory_response.status_code == 200 else {}
         
-        return {
+        result = {
             "query": query_text,
             "pattern": pattern,
             "codebase_files": codebase_results.get("results", []),
@@ -90,36 +202,53 @@ class OpenAIoAppClient:
             "timestamp": time.time(),
             "status": "success" if memory_response.status_code == 200 else "partial"
         }
+        
+        if use_cache and result["status"] == "success":
+            self._cache_set(cache_key, {key: value for key, value in result.items() if key != "timestamp"})
+        
+        return result
     
     def analyze_project_status(self) -> Dict[str, Any]:
         """
         Get comprehensive project status from governance logs and codebase
         """
         
-        # Query governance logs
-        governance_response = self.session.get(
-            f"{self.integration_service_url}/api/governance/query",
-            params={"projectId": "OF-SDLC-IMP2", "limit": 10}
-        )
-        
-        # Ask for project status summary
-        memory_response = self.session.post(
-            f"{self.integration_service_url}/api/memory/query",
-            json={
-                "query": "What is the current project status? What phases are complete and what's in progress?",
-                "scope": "combined",
-                "priority": "high"
-            }
-        )
+        # The three lookups are independent, so issue them concurrently
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            # Query governance logs
+            governance_future = executor.submit(
+                self.session.get,
+                f"{self.integration_service_url}/api/governance/query",
+                params={"projectId": "OF-SDLC-IMP2", "limit": 10},
+                timeout=self.request_timeout
+            )
+            
+            # Ask for project status summary
+            memory_future = executor.submit(
+                self.session.post,
+                f"{self.integration_service_url}/api/memory/query",
+                json={
+                    "query": "What is the current project status? What phases are complete and what's in progress?",
+                    "scope": "combined",
+                    "priority": "high"
+                },
+                timeout=self.request_timeout
+            )
+            
+            # Analyze codebase structure
+            analysis_future = executor.submit(
+                self.session.post,
+                f"{self.integration_service_url}/api/codebase/analyze",
+                json={
+                    "analysisType": "structure",
+                    "directory": "."
+                },
+                timeout=self.request_timeout
+            )
         
-        # Analyze codebase structure
-        analysis_response = self.session.post(
-            f"{self.integration_service_url}/api/codebase/analyze",
-            json={
-                "analysisType": "structure",
-                "directory": "."
-            }
-        )
+        governance_response = governance_future.result()
+        memory_response = memory_future.result()
+        analysis_response = analysis_future.result()
         
         governance_data = governance_response.json() if governance_response.status_code == 200 else {}
         memory_data = memory_response.json() if memory_response.status_code == 200 else {}
@@ -141,18 +270,28 @@ class OpenAIoAppClient:
             "status": "success"
         }
     
-    def ask_question(self, question: str, context: Optional[str] = None) -> str:
+    def ask_question(self, 
+                     question: str, 
+                     context: Optional[str] = None,
+                     use_cache: bool = True) -> str:
         """
         Ask a natural language question about the codebase/project
         
         Args:
             question: The question to ask
             context: Optional context (project, phase, etc.)
+            use_cache: Serve repeated questions from the answer cache
             
         Returns:
             Answer based on codebase knowledge and governance data
         """
         
+        cache_key = self._cache_key("ask_question", question=question, context=context)
+        if use_cache:
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                return cached
+        
         # Enhance question with context if provided
         enhanced_question = f"{question}"
         if context:
@@ -164,39 +303,138 @@ class OpenAIoAppClient:
                 "query": enhanced_question,
                 "scope": "combined",
                 "priority": "medium"
-            }
+            },
+            timeout=self.request_timeout
         )
         
         if response.status_code == 200:
-            return response.json().get("answer", "No answer available")
+            answer = response.json().get("answer", "No answer available")
+            if use_cache:
+                self._cache_set(cache_key, answer)
+            return answer
         else:
             return f"Error: {response.status_code} - {response.text}"
     
     def log_interaction(self, 
                        interaction_type: str, 
-                       details: Dict[str, Any]) -> bool:
+                       details: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Log OpenAI interaction for governance tracking
+        Queue an OpenAI interaction for governance tracking
+        
+        The entry is sent by a background worker, so the result only says
+        whether it was queued: {"status": "queued", "pending": n}, or
+        {"status": "error", ...} once the client is closed. Call flush_logs()
+        to wait for delivery and find out whether the server accepted it.
         """
         
-        response = self.session.post(
-            f"{self.integration_service_url}/api/governance/append",
-            json={
-                "entryType": f"openai_{interaction_type}",
-                "projectId": "OPENAI-INTEGRATION",
-                "summary": f"OpenAI {interaction_type}: {details.get('summary', 'Interaction logged')}",
-                "details": details
-            }
-        )
+        if self._closed:
+            return {"status": "error", "error": "client is closed"}
         
-        return response.status_code == 200
+        with self._log_lock:
+            self._log_pending += 1
+            pending = self._log_pending
+        self._log_queue.put({
+            "entryType": f"openai_{interaction_type}",
+            "projectId": "OPENAI-INTEGRATION",
+            "summary": f"OpenAI {interaction_type}: {details.get('summary', 'Interaction logged')}",
+            "details": details
+        })
+        
+        return {"status": "queued", "pending": pending}
+    
+    def flush_logs(self) -> bool:
+        """
+        Block until every queued governance entry has been sent
+        
+        Returns False if any entry failed since the last flush; the failed
+        entries and their errors are kept in log_failures.
+        """
+        self._log_queue.join()
+        with self._log_lock:
+            delivered = self._log_failures_seen == len(self.log_failures)
+            self._log_failures_seen = len(self.log_failures)
+        return delivered
+    
+    def close(self) -> None:
+        """
+        Send any queued governance entries, stop the log worker and release the session
+        
+        Waits at most close_timeout for the worker; entries it hasn't sent by then are dropped.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        atexit.unregister(self.close)
+        
+        # None tells the worker to exit once everything ahead of it is sent
+        self._log_queue.put(None)
+        self._log_worker.join(timeout=self.close_timeout)
+        if self._log_worker.is_alive():
+            # The worker is a daemon thread, so it won't keep the process alive
+            with self._log_lock:
+                dropped = self._log_pending
+            print(f"⚠️  Governance log worker still busy after {self.close_timeout}s; "
+                  f"dropping {dropped} unsent entries")
+        self.session.close()
+        if self._disk_cache is not None:
+            self._disk_cache.close()
+    
+    def __enter__(self) -> "OpenAIoAppClient":
+        return self
+    
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+    
+    def _record_log_failure(self, entries: List[Dict[str, Any]], error: str) -> None:
+        print(f"⚠️  Governance log failed for {len(entries)} entries: {error}")
+        with self._log_lock:
+            self.log_failures.extend({"entry": entry, "error": error} for entry in entries)
+    
+    def _drain_log_queue(self) -> None:
+        while True:
+            # Block for one entry, then take whatever else is already waiting
+            batch = [self._log_queue.get()]
+            while len(batch) < self.log_batch_size:
+                try:
+                    batch.append(self._log_queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            entries = [entry for entry in batch if entry is not None]
+            try:
+                if entries:
+                    response = self.session.post(
+                        f"{self.integration_service_url}/api/governance/bulk",
+                        json=entries,
+                        timeout=self.request_timeout
+                    )
+                    if response.status_code != 200:
+                        self._record_log_failure(entries, f"{response.status_code} - {response.text}")
+            except Exception as e:
+                # Anything else (e.g. unserializable details) must not kill the worker,
+                # or flush_logs() would wait forever
+                self._record_log_failure(entries, str(e))
+            finally:
+                with self._log_lock:
+                    self._log_pending -= len(entries)
+                for _ in batch:
+                    self._log_queue.task_done()
+            
+            if len(entries) < len(batch):
+                return
     
     def health_check(self) -> Dict[str, Any]:
         """
-        Check if the integration service is healthy
+        Check if the integration service is healthy, reusing a result younger than health_ttl
         """
-        response = self.session.get(f"{self.integration_service_url}/health")
-        return response.json() if response.status_code == 200 else {"status": "unhealthy"}
+        cached = self._health_cache.get(self.integration_service_url)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+        
+        response = self.session.get(f"{self.integration_service_url}/health", timeout=self.request_timeout)
+        result = response.json() if response.status_code == 200 else {"status": "unhealthy"}
+        self._health_cache[self.integration_service_url] = (time.monotonic() + self.health_ttl, result)
+        return result
 
 # Example usage and demonstration
 def demonstrate_openai_oapp_integration():
@@ -239,22 +477,29 @@ def demonstrate_openai_oapp_integration():
         "How do I use the OpenAI integration?"
     ]
     
-    for question in questions:
-        answer = client.ask_question(question)
+    # Questions are independent; fetch the answers concurrently
+    with ThreadPoolExecutor(max_workers=len(questions)) as executor:
+        answers = list(executor.map(client.ask_question, questions))
+    
+    for question, answer in zip(questions, answers):
         print(f"Q: {question}")
         print(f"A: {answer[:150]}...")
         print()
     
     # 5. Log the demonstration
     print("5️⃣ Logging Demonstration")
-    logged = client.log_interaction("demonstration", {
+    queued = client.log_interaction("demonstration", {
         "demo_completed": True,
         "questions_asked": len(questions),
         "timestamp": time.time(),
         "summary": "OpenAI integration demonstration completed successfully"
     })
+    # Queuing isn't delivery; flush_logs() reports whether the server accepted it
+    logged = queued["status"] == "queued" and client.flush_logs()
     print(f"Demonstration logged: {'✅' if logged else '❌'}")
     
+    client.close()
+    
     print("\n✅ OpenAI → oApp Integration Demonstration Complete!")
     
     return True
@@ -68,6 +68,7 @@ CREATE INDEX IF NOT EXISTS idx_projects_status ON projects_canonical(status);
 CREATE INDEX IF NOT EXISTS idx_phases_project ON phases_canonical(project_ref);
 CREATE INDEX IF NOT EXISTS idx_phases_rag ON phases_canonical(RAG);
 CREATE INDEX IF NOT EXISTS idx_steps_phase ON steps_canonical(phase_ref);
+CREATE INDEX IF NOT EXISTS idx_steps_phase_name ON steps_canonical(phase_ref, stepName);
 CREATE INDEX IF NOT EXISTS idx_steps_status ON steps_canonical(status);
 CREATE INDEX IF NOT EXISTS idx_comms_project ON comms_canonical(projectId);
 CREATE INDEX IF NOT EXISTS idx_comms_timestamp ON comms_canonical(timestamp);
@@ -5,10 +5,11 @@ Part of oApp Canonical Migration 2025-08-02
 """
 
 import sqlite3
-import json
 import sys
 from datetime import datetime
 
+from migration_common import STAGING_PRAGMAS, dump_json, insert_batches, load_json
+
 # Input files
 projects_json = "oApp_Projects_Local_Schema_20250802.json"
 
@@ -17,36 +18,42 @@ try:
     conn = sqlite3.connect("oapp_staging.db")
     cursor = conn.cursor()
     
+    cursor.executescript(STAGING_PRAGMAS)
+    
     # Load JSON
     print(f"Loading projects from {projects_json}...")
-    with open(projects_json, "r") as f:
-        projects_data = json.load(f)["data"]
+    projects_data = load_json(projects_json)["data"]
     
     print(f"Found {len(projects_data)} projects to migrate")
     
     # Insert into canonical table
-    success_count = 0
-    error_count = 0
+    errors = []
     
-    for project in projects_data:
-        try:
-            cursor.execute("""
-                INSERT OR REPLACE INTO projects_canonical 
-                (projectId, projectName, owner, status, createdAt, updatedAt)
-                VALUES (?, ?, ?, ?, datetime('now'), datetime('now'))
-            """, (
-                project.get("projectId"), 
-                project.get("projectName"), 
-                project.get("owner", ""), 
-                project.get("status", "Planning")
-            ))
-            success_count += 1
-        except Exception as e:
-            print(f"Error inserting project {project.get('projectId')}: {str(e)}")
-            error_count += 1
+    insert_sql = """
+        INSERT OR REPLACE INTO projects_canonical 
+        (projectId, projectName, owner, status, createdAt, updatedAt)
+        VALUES (?, ?, ?, ?, datetime('now'), datetime('now'))
+    """
+    rows = [
+        (
+            project.get("projectId"), 
+            project.get("projectName"), 
+            project.get("owner", ""), 
+            project.get("status", "Planning")
+        )
+        for project in projects_data
+    ]
     
+    # Single transaction for the whole load; one savepoint per batch
+    cursor.execute("BEGIN")
+    _, success_count = insert_batches(cursor, insert_sql, rows, "projectId", errors)
+    error_count = len(errors)
     conn.commit()
     
+    if errors:
+        dump_json(errors, "errors_projects_backfill.json")
+        print(f"⚠️  {error_count} projects failed to insert, see errors_projects_backfill.json")
+    
     # Create governance log
     governance_entry = {
         "timestamp": datetime.now().isoformat(),
@@ -66,8 +73,7 @@ try:
         }
     }
     
-    with open("governance_projects_backfill.json", "w") as f:
-        json.dump(governance_entry, f, indent=2)
+    dump_json(governance_entry, "governance_projects_backfill.json")
     
     print(f"✅ Projects canonical backfill complete.")
     print(f"   Successfully migrated: {success_count}")
@@ -5,10 +5,11 @@ Part of oApp Canonical Migration 2025-08-02
 """
 
 import sqlite3
-import json
 import sys
 from datetime import datetime
 
+from migration_common import STAGING_PRAGMAS, dump_json, insert_batches, load_json
+
 # Input files
 phases_json = "oApp_Phases_Export_20250802.json"
 
@@ -17,40 +18,46 @@ try:
     conn = sqlite3.connect("oapp_staging.db")
     cursor = conn.cursor()
     
+    cursor.executescript(STAGING_PRAGMAS)
+    
     # Load JSON
     print(f"Loading phases from {phases_json}...")
-    with open(phases_json, "r") as f:
-        phases_data = json.load(f)["data"]
+    phases_data = load_json(phases_json)["data"]
     
     print(f"Found {len(phases_data)} phases to migrate")
     
     # Insert into canonical table
-    success_count = 0
-    error_count = 0
+    errors = []
     
-    for phase in phases_data:
-        try:
-            cursor.execute("""
-                INSERT OR REPLACE INTO phases_canonical 
-                (phaseId, phaseName, project_ref, status, RAG, startDate, endDate, notes)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                phase.get("phaseid"), 
-                phase.get("phasename"), 
-                phase.get("WT Projects", ""),
-                phase.get("status", "Planned"),
-                phase.get("RAG", ""),
-                phase.get("startDate", ""),
-                phase.get("endDate", ""),
-                phase.get("notes", "")
-            ))
-            success_count += 1
-        except Exception as e:
-            print(f"Error inserting phase {phase.get('phaseid')}: {str(e)}")
-            error_count += 1
+    insert_sql = """
+        INSERT OR REPLACE INTO phases_canonical 
+        (phaseId, phaseName, project_ref, status, RAG, startDate, endDate, notes)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """
+    rows = [
+        (
+            phase.get("phaseid"), 
+            phase.get("phasename"), 
+            phase.get("WT Projects", ""),
+            phase.get("status", "Planned"),
+            phase.get("RAG", ""),
+            phase.get("startDate", ""),
+            phase.get("endDate", ""),
+            phase.get("notes", "")
+        )
+        for phase in phases_data
+    ]
     
+    # Single transaction for the whole load; one savepoint per batch
+    cursor.execute("BEGIN")
+    _, success_count = insert_batches(cursor, insert_sql, rows, "phaseId", errors)
+    error_count = len(errors)
     conn.commit()
     
+    if errors:
+        dump_json(errors, "errors_phases_backfill.json")
+        print(f"⚠️  {error_count} phases failed to insert, see errors_phases_backfill.json")
+    
     # Create governance log
     governance_entry = {
         "timestamp": datetime.now().isoformat(),
@@ -70,8 +77,7 @@ try:
         }
     }
     
-    with open("governance_phases_backfill.json", "w") as f:
-        json.dump(governance_entry, f, indent=2)
+    dump_json(governance_entry, "governance_phases_backfill.json")
     
     print(f"✅ Phases canonical backfill complete.")
     print(f"   Successfully migrated: {success_count}")
@@ -4,141 +4,216 @@ Extract Steps from Phase Notes and Create Canonical Steps Table
 Part of oApp Canonical Migration 2025-08-02
 """
 
-import pandas as pd
 import sqlite3
-import json
+import itertools
+import os
 import re
 import sys
 from datetime import datetime
+from multiprocessing import Pool
+
+from migration_common import STAGING_PRAGMAS, dump_json, insert_batches, iter_records
 
 phases_json = "oApp_Phases_Export_20250802.json"
 
-try:
-    conn = sqlite3.connect("oapp_staging.db")
-    cursor = conn.cursor()
-    
-    # Load phases
-    print(f"Loading phases from {phases_json}...")
-    with open(phases_json, "r") as f:
-        phases_data = pd.DataFrame(json.load(f)["data"])
-    
-    print(f"Analyzing {len(phases_data)} phases for step extraction...")
+# Fan extraction out to worker processes only above this many phases with notes;
+# below it, process start-up costs more than the regex work saves
+PARALLEL_MIN_PHASES = 500
+
+# Step notations found in phase notes, fused into a single alternation so
+# each note is scanned once. Earlier alternatives win at a given position.
+STEP_NOTATIONS = [
+    r"StepTaskOutput(?P<sto_num>\d+\.\d+)\s*(?P<sto_text>[A-Za-z][^\n]*)",  # StepTaskOutput1.1 Description
+    r"Step\s*(?P<step_num>\d+\.\d+)[:\s]*(?P<step_text>[^\n]*)",           # Step 1.1: Description
+    r"(?P<num>\d+\.\d+)\s*(?P<num_text>[A-Za-z][^\n]*)",                    # 1.1 Description
+    r"[✅🔲🔄]\s*(?P<task>[^\n]+)",                                           # Completed / planned / in progress tasks
+]
+STEP_PATTERN = re.compile("|".join(STEP_NOTATIONS), re.IGNORECASE)
+
+# Characters stripped from extracted step names
+CLEAN_PATTERN = re.compile(r'[^\w\s\-\(\)\[\]\.,:;]')
+
+# Same filter as a str.translate table for the common all-ASCII case
+ASCII_DELETE_TABLE = {i: None for i in range(128) if CLEAN_PATTERN.match(chr(i))}
+
+# Characters of the phase notes kept around each match as the step's outputNotes;
+# the full notes already live once in phases_canonical
+NOTES_CONTEXT_BEFORE = 40
+NOTES_CONTEXT_AFTER = 120
+
+STEPS_INSERT_SQL = """
+    INSERT OR REPLACE INTO steps_canonical 
+    (stepId, stepName, phase_ref, project_ref, status, outputNotes)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+# Also in 01_create_canonical_tables.sql; created again before the load so
+# staging DBs built from the older DDL get it too
+STEPS_LOOKUP_INDEX = "CREATE INDEX IF NOT EXISTS idx_steps_phase_name ON steps_canonical(phase_ref, stepName)"
+
+def notes_context(notes, match):
+    """Slice of notes surrounding a step match"""
+    return notes[max(0, match.start() - NOTES_CONTEXT_BEFORE):match.end() + NOTES_CONTEXT_AFTER]
+
+def clean_step_name(name):
+    """Strip disallowed characters, skipping the regex engine for ASCII names"""
+    if name.isascii():
+        return name.translate(ASCII_DELETE_TABLE)
+    return CLEAN_PATTERN.sub('', name)
+
+def extract_from_phase(phase):
+    """
+    Run step extraction for one phase record (also used in worker processes).
+    Returns (phase_id, project_ref, status, steps) where steps holds one
+    (cleaned name, notes context) pair per notation match; phases without
+    notes yield no steps.
+    """
+    notes = phase.get("notes", "")
+    phase_id = phase.get("phaseid", "")
+    project_ref = phase.get("WT Projects", "")
     
-    # Enhanced step extraction patterns
-    step_patterns = [
-        re.compile(r"StepTaskOutput(\d+\.\d+)[^\n]*([^\n]*)", re.IGNORECASE),
-        re.compile(r"(\d+\.\d+)\s*([A-Za-z][^\n]*)", re.IGNORECASE),
-        re.compile(r"Step\s*(\d+\.\d+)[:\s]*([^\n]*)", re.IGNORECASE),
-        re.compile(r"✅\s*([^\n]+)", re.IGNORECASE),  # Completed tasks
-        re.compile(r"🔲\s*([^\n]+)", re.IGNORECASE),  # Planned tasks
-        re.compile(r"🔄\s*([^\n]+)", re.IGNORECASE),  # In progress tasks
-    ]
+    steps = []
+    if notes and phase_id:
+        # Single pass over the notes for every step notation
+        for match in STEP_PATTERN.finditer(notes):
+            step_name = " ".join(g for g in match.groups() if g).strip()
+            steps.append((clean_step_name(step_name)[:200], notes_context(notes, match)))
     
+    return phase_id, project_ref, phase.get("status", "Planned"), steps
+
+def iter_step_matches(results):
+    """Flatten extract_from_phase results to one (phase_id, project_ref, status, step_name, output_notes) per match"""
+    for phase_id, project_ref, status, phase_steps in results:
+        for step_name, output_notes in phase_steps:
+            yield phase_id, project_ref, status, step_name, output_notes
+
+def build_step_rows(results):
+    """
+    Turn extract_from_phase results into steps_canonical rows.
+    Returns (rows, extracted_count); extracted_count includes the duplicate
+    step names that dedup drops.
+    """
     steps = []
-    step_counter = 0
+    seen = set()  # (stepName, phase_ref) pairs already extracted
+    extracted_count = 0
     
-    for _, row in phases_data.iterrows():
-        notes = row.get("notes", "")
-        phase_id = row.get("phaseid", "")
-        project_ref = row.get("WT Projects", "")
+    # Step IDs number every match across the export, short ones included
+    matches = iter_step_matches(results)
+    for step_counter, (phase_id, project_ref, status, step_name, output_notes) in enumerate(matches, 1):
+        if len(step_name) <= 10:  # Only include meaningful steps
+            continue
+        extracted_count += 1
         
-        if not notes or not phase_id:
+        # Keep the first occurrence of each step name within a phase
+        key = (step_name, phase_id)
+        if key in seen:
             continue
-            
-        # Try each pattern
-        for i, pattern in enumerate(step_patterns):
-            matches = pattern.findall(notes)
-            for match in matches:
-                step_counter += 1
-                
-                if isinstance(match, tuple):
-                    step_name = " ".join(str(m) for m in match if m).strip()
-                    step_id = f"{phase_id}-{step_counter}"
-                else:
-                    step_name = str(match).strip()
-                    step_id = f"{phase_id}-{step_counter}"
-                
-                # Clean step name
-                step_name = re.sub(r'[^\w\s\-\(\)\[\]\.,:;]', '', step_name)[:200]
-                
-                if len(step_name) > 10:  # Only include meaningful steps
-                    steps.append({
-                        "stepId": step_id,
-                        "stepName": step_name,
-                        "phase_ref": phase_id,
-                        "project_ref": project_ref,
-                        "status": row.get("status", "Planned"),
-                        "outputNotes": notes[:1000]  # Truncate for storage
-                    })
-    
-    print(f"Extracted {len(steps)} potential steps")
-    
-    # Remove duplicates based on stepName and phase_ref
-    steps_df = pd.DataFrame(steps)
-    if not steps_df.empty:
-        steps_df = steps_df.drop_duplicates(subset=['stepName', 'phase_ref'])
-        print(f"After deduplication: {len(steps_df)} unique steps")
+        seen.add(key)
+        
+        steps.append((
+            f"{phase_id}-{step_counter}",
+            step_name,
+            phase_id,
+            project_ref,
+            status,
+            output_notes
+        ))
     
-    # Create GovernanceLog entry
-    governance_entry = {
-        "timestamp": datetime.now().isoformat(),
-        "event_type": "canonical_migration",
-        "user_id": "system",
-        "user_role": "migration_script",
-        "resource_type": "steps_canonical",
-        "action": "extract_and_backfill",
-        "success": True,
-        "details": {
-            "source": "oApp_Phases_Export_20250802.json",
-            "target": "steps_canonical",
-            "total_extracted": len(steps),
-            "unique_steps": len(steps_df) if not steps_df.empty else 0,
-            "extraction_patterns": len(step_patterns),
-            "phase": "staging"
+    return steps, extracted_count
+
+def main():
+    try:
+        conn = sqlite3.connect("oapp_staging.db")
+        cursor = conn.cursor()
+        
+        cursor.executescript(STAGING_PRAGMAS)
+        
+        # Stream phases straight into the extraction loop
+        print(f"Loading phases from {phases_json}...")
+        
+        phase_count = 0
+        candidate_count = 0
+        
+        def iter_candidates():
+            """Only phases with notes and an ID can yield steps; count the rest"""
+            nonlocal phase_count, candidate_count
+            for phase in iter_records(phases_json):
+                phase_count += 1
+                if phase.get("notes") and phase.get("phaseid"):
+                    candidate_count += 1
+                    yield phase
+        
+        # Peek ahead to decide whether there is enough work to parallelize
+        records = iter_candidates()
+        head = list(itertools.islice(records, PARALLEL_MIN_PHASES + 1))
+        pool = Pool(os.cpu_count()) if len(head) > PARALLEL_MIN_PHASES else None
+        
+        try:
+            if pool is not None:
+                # Ordered imap keeps step IDs and first-occurrence dedup deterministic
+                results = pool.imap(extract_from_phase, itertools.chain(head, records), chunksize=64)
+            else:
+                results = map(extract_from_phase, head)
+            steps, extracted_count = build_step_rows(results)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+        
+        print(f"Analyzed {candidate_count}/{phase_count} phases with notes for step extraction")
+        print(f"Extracted {extracted_count} potential steps")
+        print(f"After deduplication: {len(steps)} unique steps")
+        
+        # Create GovernanceLog entry
+        governance_entry = {
+            "timestamp": datetime.now().isoformat(),
+            "event_type": "canonical_migration",
+            "user_id": "system",
+            "user_role": "migration_script",
+            "resource_type": "steps_canonical",
+            "action": "extract_and_backfill",
+            "success": True,
+            "details": {
+                "source": "oApp_Phases_Export_20250802.json",
+                "target": "steps_canonical",
+                "total_extracted": extracted_count,
+                "unique_steps": len(steps),
+                "extraction_patterns": len(STEP_NOTATIONS),
+                "phase": "staging"
+            }
         }
-    }
-    
-    # Insert into canonical table
-    success_count = 0
-    error_count = 0
-    
-    if not steps_df.empty:
-        for _, row in steps_df.iterrows():
-            try:
-                cursor.execute("""
-                    INSERT OR REPLACE INTO steps_canonical 
-                    (stepId, stepName, phase_ref, project_ref, status, outputNotes)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, (
-                    row.get("stepId"),
-                    row.get("stepName"),
-                    row.get("phase_ref"),
-                    row.get("project_ref"),
-                    row.get("status"),
-                    row.get("outputNotes")
-                ))
-                success_count += 1
-            except Exception as e:
-                print(f"Error inserting step {row.get('stepId')}: {str(e)}")
-                error_count += 1
-    
-    conn.commit()
-    
-    # Log governance
-    governance_entry["details"]["success_count"] = success_count
-    governance_entry["details"]["error_count"] = error_count
-    
-    with open("governance_steps_extraction.json", "w") as f:
-        json.dump(governance_entry, f, indent=2)
-    
-    print(f"✅ Steps extraction and backfill complete.")
-    print(f"   Successfully migrated: {success_count}")
-    print(f"   Errors: {error_count}")
-    print(f"   Governance log: governance_steps_extraction.json")
-    
-except Exception as e:
-    print(f"❌ Migration failed: {str(e)}")
-    sys.exit(1)
-finally:
-    if 'conn' in locals():
-        conn.close()
\ No newline at end of file
+        
+        # Insert into canonical table
+        errors = []
+        
+        # Single transaction for the whole load; one savepoint per batch
+        cursor.execute("BEGIN")
+        cursor.execute(STEPS_LOOKUP_INDEX)
+        _, success_count = insert_batches(cursor, STEPS_INSERT_SQL, steps, "stepId", errors)
+        error_count = len(errors)
+        conn.commit()
+        
+        if errors:
+            dump_json(errors, "errors_steps_extraction.json")
+            print(f"⚠️  {error_count} steps failed to insert, see errors_steps_extraction.json")
+        
+        # Log governance
+        governance_entry["details"]["success_count"] = success_count
+        governance_entry["details"]["error_count"] = error_count
+        
+        dump_json(governance_entry, "governance_steps_extraction.json")
+        
+        print(f"✅ Steps extraction and backfill complete.")
+        print(f"   Successfully migrated: {success_count}")
+        print(f"   Errors: {error_count}")
+        print(f"   Governance log: governance_steps_extraction.json")
+        
+    except Exception as e:
+        print(f"❌ Migration failed: {str(e)}")
+        sys.exit(1)
+    finally:
+        if 'conn' in locals():
+            conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -5,87 +5,84 @@ Part of oApp Canonical Migration 2025-08-02
 """
 
 import sqlite3
-import json
-import re
 import sys
 from datetime import datetime
 
+from migration_common import STAGING_PRAGMAS, dump_json, load_json, load_script
+
 phases_json = "oApp_Phases_Export_20250802.json"
 
+# Same step notations, name cleaning and notes context as 04_extract_steps.py
+_extract_steps = load_script("04_extract_steps.py")
+STEP_NOTATIONS = _extract_steps.STEP_NOTATIONS
+STEP_PATTERN = _extract_steps.STEP_PATTERN
+clean_step_name = _extract_steps.clean_step_name
+notes_context = _extract_steps.notes_context
+
 try:
     conn = sqlite3.connect("oapp_staging.db")
     cursor = conn.cursor()
     
+    cursor.executescript(STAGING_PRAGMAS)
+    
     # Load phases
     print(f"Loading phases from {phases_json}...")
-    with open(phases_json, "r") as f:
-        phases_data = json.load(f)["data"]
-    
-    print(f"Analyzing {len(phases_data)} phases for step extraction...")
+    phases_data = load_json(phases_json)["data"]
     
-    # Enhanced step extraction patterns
-    step_patterns = [
-        re.compile(r"StepTaskOutput(\d+\.\d+)[^\n]*([^\n]*)", re.IGNORECASE),
-        re.compile(r"(\d+\.\d+)\s*([A-Za-z][^\n]*)", re.IGNORECASE),
-        re.compile(r"Step\s*(\d+\.\d+)[:\s]*([^\n]*)", re.IGNORECASE),
-        re.compile(r"✅\s*([^\n]+)", re.IGNORECASE),  # Completed tasks
-        re.compile(r"🔲\s*([^\n]+)", re.IGNORECASE),  # Planned tasks
-        re.compile(r"🔄\s*([^\n]+)", re.IGNORECASE),  # In progress tasks
-    ]
+    # Only phases with notes and an ID can yield steps
+    candidates = [p for p in phases_data if p.get("notes") and p.get("phaseid")]
+    print(f"Analyzing {len(candidates)}/{len(phases_data)} phases with notes for step extraction...")
     
     steps = []
     step_counter = 0
     success_count = 0
     error_count = 0
+    errors = []
     
-    for phase in phases_data:
-        notes = phase.get("notes", "")
-        phase_id = phase.get("phaseid", "")
-        project_ref = phase.get("WT Projects", "")
+    # Single pass over each phase's notes for every step notation
+    matches = (
+        (phase, match)
+        for phase in candidates
+        for match in STEP_PATTERN.finditer(phase["notes"])
+    )
+    
+    for step_counter, (phase, match) in enumerate(matches, 1):
+        notes = phase["notes"]
+        phase_id = phase["phaseid"]
+        step_id = f"{phase_id}-{step_counter}"
+        step_name = " ".join(g for g in match.groups() if g).strip()
+        
+        # Clean step name
+        step_name = clean_step_name(step_name)[:200]
         
-        if not notes or not phase_id:
-            continue
-            
-        # Try each pattern
-        for pattern in step_patterns:
-            matches = pattern.findall(notes)
-            for match in matches:
-                step_counter += 1
-                
-                if isinstance(match, tuple):
-                    step_name = " ".join(str(m) for m in match if m).strip()
-                    step_id = f"{phase_id}-{step_counter}"
-                else:
-                    step_name = str(match).strip()
-                    step_id = f"{phase_id}-{step_counter}"
-                
-                # Clean step name
-                step_name = re.sub(r'[^\w\s\-\(\)\[\]\.,:;]', '', step_name)[:200]
-                
-                if len(step_name) > 10:  # Only include meaningful steps
-                    try:
-                        cursor.execute("""
-                            INSERT OR REPLACE INTO steps_canonical 
-                            (stepId, stepName, phase_ref, project_ref, status, outputNotes)
-                            VALUES (?, ?, ?, ?, ?, ?)
-                        """, (
-                            step_id,
-                            step_name,
-                            phase_id,
-                            project_ref,
-                            phase.get("status", "Planned"),
-                            notes[:1000]  # Truncate for storage
-                        ))
-                        success_count += 1
-                    except Exception as e:
-                        print(f"Error inserting step {step_id}: {str(e)}")
-                        error_count += 1
+        if len(step_name) > 10:  # Only include meaningful steps
+            try:
+                cursor.execute("""
+                    INSERT OR REPLACE INTO steps_canonical 
+                    (stepId, stepName, phase_ref, project_ref, status, outputNotes)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, (
+                    step_id,
+                    step_name,
+                    phase_id,
+                    phase.get("WT Projects", ""),
+                    phase.get("status", "Planned"),
+                    notes_context(notes, match)
+                ))
+                success_count += 1
+            except Exception as e:
+                errors.append({"stepId": step_id, "error": str(e)})
+                error_count += 1
     
     conn.commit()
     
     print(f"Extracted {step_counter} potential steps")
     print(f"Successfully inserted: {success_count}")
     
+    if errors:
+        dump_json(errors, "errors_steps_extraction.json")
+        print(f"⚠️  {error_count} steps failed to insert, see errors_steps_extraction.json")
+    
     # Create governance log
     governance_entry = {
         "timestamp": datetime.now().isoformat(),
@@ -101,13 +98,12 @@ try:
             "total_extracted": step_counter,
             "success_count": success_count,
             "error_count": error_count,
-            "extraction_patterns": len(step_patterns),
+            "extraction_patterns": len(STEP_NOTATIONS),
             "phase": "staging"
         }
     }
     
-    with open("governance_steps_extraction.json", "w") as f:
-        json.dump(governance_entry, f, indent=2)
+    dump_json(governance_entry, "governance_steps_extraction.json")
     
     print(f"✅ Steps extraction and backfill complete.")
     print(f"   Successfully migrated: {success_count}")
@@ -4,123 +4,178 @@ Merge Agent Exchange + Claude-Gizmo Communications into Canonical Table
 Part of oApp Canonical Migration 2025-08-02
 """
 
-import pandas as pd
-import sqlite3
+import itertools
 import json
+import os
 import sys
 from datetime import datetime
+from multiprocessing import Pool
 
-logs_json = "oApp_AgentLogs_20250802.json"
+from migration_common import chunked, connect_staging, dump_json, insert_batches, iter_records
 
 try:
-    conn = sqlite3.connect("oapp_staging.db")
-    cursor = conn.cursor()
-    
-    # Load communication logs
-    print(f"Loading communication logs from {logs_json}...")
-    with open(logs_json, "r") as f:
-        logs_data = json.load(f)["data"]
-    
-    print(f"Found {len(logs_data)} communication entries to migrate")
-    
-    # Create GovernanceLog entry
-    governance_entry = {
-        "timestamp": datetime.now().isoformat(),
-        "event_type": "canonical_migration",
-        "user_id": "system",
-        "user_role": "migration_script",
-        "resource_type": "comms_canonical",
-        "action": "merge_communications",
-        "success": True,
-        "details": {
-            "source": "oApp_AgentLogs_20250802.json",
-            "target": "comms_canonical",
-            "record_count": len(logs_data),
-            "phase": "staging"
-        }
-    }
-    
+    import orjson
+except ImportError:
+    orjson = None
+
+logs_json = "oApp_AgentLogs_20250802.json"
+
+# Log entries per chunk; exports larger than one chunk have their rows built
+# in worker processes
+BATCH_SIZE = 10_000
+
+# user_role -> comms agentType; unmapped roles are stored as-is
+ROLE_MAP = {
+    "developer": "Claude",
+    "assistant": "Claude",
+    "architect": "Gizmo",
+    "system": "System",
+}
+
+insert_sql = """
+    INSERT INTO comms_canonical 
+    (timestamp, agentType, eventType, projectId, phaseId, messagePayload)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+def dumps_payload(obj):
+    """Compact JSON text for messagePayload, using orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+def build_rows(entries):
+    """
+    Map a chunk of log entries to comms_canonical rows (also used in worker processes).
+    Returns (rows, agent_counts, errors) with one error message per entry that failed.
+    """
     rows = []
-    success_count = 0
-    error_count = 0
+    agent_counts = {}  # Entries per mapped agentType, for the governance summary
+    errors = []
     
-    for entry in logs_data:
+    for entry in entries:
         try:
-            # Extract project and phase IDs from details
-            details = entry.get("details", {})
-            runtime_context = entry.get("runtime_context", {})
+            # Map user_role to agentType
+            user_role = entry.get("user_role", "unknown")
+            agent_type = ROLE_MAP.get(user_role, user_role)
+            if user_role in ROLE_MAP:
+                agent_counts[agent_type] = agent_counts.get(agent_type, 0) + 1
             
-            # Try to extract projectId from multiple sources
-            project_id = None
+            # Extract project and phase IDs from details; non-dict details carry
+            # no IDs and are stored as plain text
+            details = entry.get("details", {})
             if isinstance(details, dict):
+                runtime_context = entry.get("runtime_context", {})
                 project_id = details.get("projectId") or details.get("resource_id") or runtime_context.get("projectId")
-            
-            # Try to extract phaseId from details or runtime_context
-            phase_id = None
-            if isinstance(details, dict):
                 phase_id = details.get("phase") or details.get("phaseId") or runtime_context.get("phase")
+                payload = dumps_payload(details)
+            else:
+                project_id = phase_id = None
+                payload = str(details)
             
-            # Map user_role to agentType
-            agent_type = entry.get("user_role", "unknown")
-            if agent_type == "developer":
-                agent_type = "Claude"
-            elif agent_type == "architect":
-                agent_type = "Gizmo"
-            elif agent_type == "system":
-                agent_type = "System"
-            elif agent_type == "assistant":
-                agent_type = "Claude"
-            
-            row_data = {
-                "timestamp": entry.get("timestamp"),
-                "agentType": agent_type,
-                "eventType": entry.get("event_type"),
-                "projectId": project_id,
-                "phaseId": phase_id,
-                "messagePayload": json.dumps(details) if isinstance(details, dict) else str(details)
-            }
-            
-            cursor.execute("""
-                INSERT INTO comms_canonical 
-                (timestamp, agentType, eventType, projectId, phaseId, messagePayload)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (
-                row_data["timestamp"],
-                row_data["agentType"],
-                row_data["eventType"],
-                row_data["projectId"],
-                row_data["phaseId"],
-                row_data["messagePayload"]
+            rows.append((
+                entry.get("timestamp"),
+                agent_type,
+                entry.get("event_type"),
+                project_id,
+                phase_id,
+                payload
             ))
             
-            success_count += 1
-            
         except Exception as e:
-            print(f"Error processing communication entry: {str(e)}")
-            error_count += 1
-    
-    conn.commit()
-    
-    # Log governance
-    governance_entry["details"]["success_count"] = success_count
-    governance_entry["details"]["error_count"] = error_count
-    governance_entry["details"]["agent_types"] = {
-        "Claude": len([r for r in logs_data if r.get("user_role") in ["developer", "assistant"]]),
-        "Gizmo": len([r for r in logs_data if r.get("user_role") == "architect"]),
-        "System": len([r for r in logs_data if r.get("user_role") == "system"])
-    }
+            errors.append(str(e))
     
-    with open("governance_comms_merge.json", "w") as f:
-        json.dump(governance_entry, f, indent=2)
-    
-    print(f"✅ Communications merge complete.")
-    print(f"   Successfully migrated: {success_count}")
-    print(f"   Errors: {error_count}")
-    print(f"   Governance log: governance_comms_merge.json")
-    
-except Exception as e:
-    print(f"❌ Migration failed: {str(e)}")
-    sys.exit(1)
-finally:
-    if 'conn' in locals():
-        conn.close()
\ No newline at end of file
+    return rows, agent_counts, errors
+
+def main():
+    try:
+        conn = connect_staging("oapp_staging.db")
+        cursor = conn.cursor()
+        
+        # Load communication logs
+        print(f"Streaming communication logs from {logs_json}...")
+        
+        # Create GovernanceLog entry
+        governance_entry = {
+            "timestamp": datetime.now().isoformat(),
+            "event_type": "canonical_migration",
+            "user_id": "system",
+            "user_role": "migration_script",
+            "resource_type": "comms_canonical",
+            "action": "merge_communications",
+            "success": True,
+            "details": {
+                "source": "oApp_AgentLogs_20250802.json",
+                "target": "comms_canonical",
+                "phase": "staging"
+            }
+        }
+        
+        record_count = 0
+        success_count = 0
+        error_count = 0
+        insert_errors = []
+        agent_counts = {"Claude": 0, "Gizmo": 0, "System": 0}
+        
+        # Peek ahead: a single batch isn't worth the process start-up
+        chunks = chunked(iter_records(logs_json), BATCH_SIZE)
+        head = list(itertools.islice(chunks, 2))
+        pool = Pool(os.cpu_count()) if len(head) > 1 else None
+        
+        # Single transaction for the whole merge, one savepoint per batch.
+        # Workers only build rows; all SQLite writes stay in this process.
+        cursor.execute("BEGIN")
+        try:
+            if pool is not None:
+                results = pool.imap(build_rows, itertools.chain(head, chunks))
+            else:
+                results = map(build_rows, head)
+            
+            for rows, chunk_agents, chunk_errors in results:
+                record_count += len(chunk_errors)
+                for agent_type, count in chunk_agents.items():
+                    agent_counts[agent_type] += count
+                for error in chunk_errors:
+                    print(f"Error processing communication entry: {error}")
+                error_count += len(chunk_errors)
+                
+                chunk_records, chunk_success = insert_batches(
+                    cursor, insert_sql, rows, "timestamp", insert_errors, size=BATCH_SIZE
+                )
+                record_count += chunk_records
+                success_count += chunk_success
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+        conn.commit()
+        error_count += len(insert_errors)
+        
+        print(f"Processed {record_count} communication entries")
+        
+        if insert_errors:
+            dump_json(insert_errors, "errors_comms_merge.json")
+            print(f"⚠️  {len(insert_errors)} communication entries failed to insert, see errors_comms_merge.json")
+        
+        # Log governance
+        governance_entry["details"]["record_count"] = record_count
+        governance_entry["details"]["success_count"] = success_count
+        governance_entry["details"]["error_count"] = error_count
+        governance_entry["details"]["agent_types"] = agent_counts
+        
+        dump_json(governance_entry, "governance_comms_merge.json")
+        
+        print(f"✅ Communications merge complete.")
+        print(f"   Successfully migrated: {success_count}")
+        print(f"   Errors: {error_count}")
+        print(f"   Governance log: governance_comms_merge.json")
+        
+    except Exception as e:
+        print(f"❌ Migration failed: {str(e)}")
+        sys.exit(1)
+    finally:
+        if 'conn' in locals():
+            conn.close()
+
+if __name__ == "__main__":
+    main()
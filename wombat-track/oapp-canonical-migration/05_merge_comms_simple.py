@@ -4,81 +4,109 @@ Merge Agent Exchange + Claude-Gizmo Communications (No Pandas Version)
 Part of oApp Canonical Migration 2025-08-02
 """
 
-import sqlite3
 import json
 import sys
 from datetime import datetime
 
+from migration_common import connect_staging, dump_json, insert_batches, iter_records
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logs_json = "oApp_AgentLogs_20250802.json"
 
+# Comms rows held in memory before each insert
+BATCH_SIZE = 10_000
+
+# user_role -> comms agentType; unmapped roles are stored as-is
+ROLE_MAP = {
+    "developer": "Claude",
+    "assistant": "Claude",
+    "architect": "Gizmo",
+    "system": "System",
+}
+
+insert_sql = """
+    INSERT INTO comms_canonical 
+    (timestamp, agentType, eventType, projectId, phaseId, messagePayload)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+def dumps_payload(obj):
+    """Compact JSON text for messagePayload, using orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
 try:
-    conn = sqlite3.connect("oapp_staging.db")
+    conn = connect_staging("oapp_staging.db")
     cursor = conn.cursor()
     
     # Load communication logs
-    print(f"Loading communication logs from {logs_json}...")
-    with open(logs_json, "r") as f:
-        logs_data = json.load(f)["data"]
-    
-    print(f"Found {len(logs_data)} communication entries to migrate")
+    print(f"Streaming communication logs from {logs_json}...")
     
     success_count = 0
     error_count = 0
+    record_count = 0
+    buffer = []
+    insert_errors = []
     agent_counts = {"Claude": 0, "Gizmo": 0, "System": 0, "Unknown": 0}
     
-    for entry in logs_data:
+    # Single transaction for the whole merge, flushed in BATCH_SIZE chunks, one savepoint each
+    cursor.execute("BEGIN")
+    for entry in iter_records(logs_json):
+        record_count += 1
         try:
-            # Extract project and phase IDs from details
+            # Extract project and phase IDs from details; non-dict details carry
+            # no IDs and are stored as plain text
             details = entry.get("details", {})
-            runtime_context = entry.get("runtime_context", {})
-            
-            # Try to extract projectId from multiple sources
-            project_id = None
             if isinstance(details, dict):
+                runtime_context = entry.get("runtime_context", {})
                 project_id = details.get("projectId") or details.get("resource_id") or runtime_context.get("projectId")
-            
-            # Try to extract phaseId from details or runtime_context
-            phase_id = None
-            if isinstance(details, dict):
                 phase_id = details.get("phase") or details.get("phaseId") or runtime_context.get("phase")
+                payload = dumps_payload(details)
+            else:
+                project_id = phase_id = None
+                payload = str(details)
             
             # Map user_role to agentType
-            agent_type = entry.get("user_role", "unknown")
-            if agent_type == "developer":
-                agent_type = "Claude"
-                agent_counts["Claude"] += 1
-            elif agent_type == "architect":
-                agent_type = "Gizmo"
-                agent_counts["Gizmo"] += 1
-            elif agent_type == "system":
-                agent_type = "System"
-                agent_counts["System"] += 1
-            elif agent_type == "assistant":
-                agent_type = "Claude"
-                agent_counts["Claude"] += 1
-            else:
+            role = entry.get("user_role", "unknown")
+            agent_type = ROLE_MAP.get(role)
+            if agent_type is None:
+                agent_type = role
                 agent_counts["Unknown"] += 1
+            else:
+                agent_counts[agent_type] += 1
             
-            cursor.execute("""
-                INSERT INTO comms_canonical 
-                (timestamp, agentType, eventType, projectId, phaseId, messagePayload)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (
+            buffer.append((
                 entry.get("timestamp"),
                 agent_type,
                 entry.get("event_type"),
                 project_id,
                 phase_id,
-                json.dumps(details) if isinstance(details, dict) else str(details)
+                payload
             ))
             
-            success_count += 1
-            
         except Exception as e:
             print(f"Error processing communication entry: {str(e)}")
             error_count += 1
+        
+        if len(buffer) >= BATCH_SIZE:
+            success_count += insert_batches(cursor, insert_sql, buffer, "timestamp", insert_errors, size=BATCH_SIZE)[1]
+            buffer.clear()
     
+    if buffer:
+        success_count += insert_batches(cursor, insert_sql, buffer, "timestamp", insert_errors, size=BATCH_SIZE)[1]
     conn.commit()
+    error_count += len(insert_errors)
+    
+    print(f"Processed {record_count} communication entries")
+    
+    if insert_errors:
+        dump_json(insert_errors, "errors_comms_merge.json")
+        print(f"⚠️  {len(insert_errors)} communication entries failed to insert, see errors_comms_merge.json")
     
     # Create governance log
     governance_entry = {
@@ -92,7 +120,7 @@ try:
         "details": {
             "source": "oApp_AgentLogs_20250802.json",
             "target": "comms_canonical",
-            "record_count": len(logs_data),
+            "record_count": record_count,
             "success_count": success_count,
             "error_count": error_count,
             "agent_distribution": agent_counts,
@@ -100,8 +128,7 @@ try:
         }
     }
     
-    with open("governance_comms_merge.json", "w") as f:
-        json.dump(governance_entry, f, indent=2)
+    dump_json(governance_entry, "governance_comms_merge.json")
     
     print(f"✅ Communications merge complete.")
     print(f"   Successfully migrated: {success_count}")
@@ -5,15 +5,22 @@ Part of oApp Canonical Migration 2025-08-02
 """
 
 import sqlite3
-import json
 import sys
 from datetime import datetime
 
+from migration_common import VALIDATION_INDEXES, dump_json
+
 def validate_migration():
     try:
         conn = sqlite3.connect("oapp_staging.db")
         cursor = conn.cursor()
         
+        # Make sure the anti-joins below are index lookups, with fresh planner stats
+        for statement in VALIDATION_INDEXES:
+            cursor.execute(statement)
+        cursor.execute("ANALYZE")
+        conn.commit()
+        
         validation_results = {
             "timestamp": datetime.now().isoformat(),
             "migration_validation": "oapp-canonical-schema-migration-20250802",
@@ -21,39 +28,33 @@ def validate_migration():
             "results": {}
         }
         
-        # Check table counts
-        tables = ["projects_canonical", "phases_canonical", "steps_canonical", "comms_canonical"]
+        # Table counts and relationship checks in a single statement
+        cursor.execute("""
+            SELECT
+                (SELECT COUNT(*) FROM projects_canonical),
+                (SELECT COUNT(*) FROM phases_canonical),
+                (SELECT COUNT(*) FROM steps_canonical),
+                (SELECT COUNT(*) FROM comms_canonical),
+                (SELECT COUNT(*) FROM phases_canonical p 
+                 LEFT JOIN projects_canonical pr ON p.project_ref = pr.projectId 
+                 WHERE pr.projectId IS NULL AND p.project_ref IS NOT NULL AND p.project_ref != ''),
+                (SELECT COUNT(*) FROM steps_canonical s 
+                 LEFT JOIN phases_canonical p ON s.phase_ref = p.phaseId 
+                 WHERE p.phaseId IS NULL AND s.phase_ref IS NOT NULL AND s.phase_ref != ''),
+                -- Communication links
+                (SELECT COUNT(*) FROM comms_canonical c 
+                 LEFT JOIN projects_canonical p ON c.projectId = p.projectId 
+                 WHERE c.projectId IS NOT NULL AND p.projectId IS NULL)
+        """)
+        *table_counts, orphaned_phases, orphaned_steps, orphaned_comms_projects = cursor.fetchone()
         
-        for table in tables:
-            cursor.execute(f"SELECT COUNT(*) FROM {table}")
-            count = cursor.fetchone()[0]
+        tables = ["projects_canonical", "phases_canonical", "steps_canonical", "comms_canonical"]
+        for table, count in zip(tables, table_counts):
             validation_results["results"][f"{table}_count"] = count
             print(f"✅ {table}: {count} records")
         
-        # Check relationships
-        cursor.execute("""
-            SELECT COUNT(*) FROM phases_canonical p 
-            LEFT JOIN projects_canonical pr ON p.project_ref = pr.projectId 
-            WHERE pr.projectId IS NULL AND p.project_ref IS NOT NULL AND p.project_ref != ''
-        """)
-        orphaned_phases = cursor.fetchone()[0]
         validation_results["results"]["orphaned_phases"] = orphaned_phases
-        
-        cursor.execute("""
-            SELECT COUNT(*) FROM steps_canonical s 
-            LEFT JOIN phases_canonical p ON s.phase_ref = p.phaseId 
-            WHERE p.phaseId IS NULL AND s.phase_ref IS NOT NULL AND s.phase_ref != ''
-        """)
-        orphaned_steps = cursor.fetchone()[0]
         validation_results["results"]["orphaned_steps"] = orphaned_steps
-        
-        # Check communication links
-        cursor.execute("""
-            SELECT COUNT(*) FROM comms_canonical c 
-            LEFT JOIN projects_canonical p ON c.projectId = p.projectId 
-            WHERE c.projectId IS NOT NULL AND p.projectId IS NULL
-        """)
-        orphaned_comms_projects = cursor.fetchone()[0]
         validation_results["results"]["orphaned_comms_projects"] = orphaned_comms_projects
         
         # Agent type distribution
@@ -62,8 +63,9 @@ def validate_migration():
         validation_results["results"]["agent_distribution"] = agent_distribution
         
         # Sample data validation
+        # projectId is the PRIMARY KEY, so its autoindex already backs this scan
         cursor.execute("SELECT projectId, projectName FROM projects_canonical LIMIT 5")
-        sample_projects = [{"projectId": row[0], "projectName": row[1]} for row in cursor.fetchall()]
+        sample_projects = [dict(zip(("projectId", "projectName"), row)) for row in cursor.fetchmany(5)]
         validation_results["results"]["sample_projects"] = sample_projects
         
         # Calculate completion status
@@ -72,8 +74,7 @@ def validate_migration():
         validation_results["total_issues"] = total_issues
         
         # Save validation report
-        with open("validation_report.json", "w") as f:
-            json.dump(validation_results, f, indent=2)
+        dump_json(validation_results, "validation_report.json")
         
         print(f"\n📊 Migration Validation Summary:")
         print(f"   Status: {validation_results['validation_status']}")
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Backfill Projects, Phases and Steps in a Single Run
+Part of oApp Canonical Migration 2025-08-02
+
+Does the work of 02_backfill_projects.py, 03_backfill_phases.py and
+04_extract_steps.py over one connection and one write transaction:
+PRAGMAs are applied once and a failure in any stage rolls back all three.
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+from datetime import datetime
+
+from migration_common import STAGING_PRAGMAS, dump_json, insert_batches, iter_records, load_script
+
+# Each stage is the numbered script's own loader, run inside this script's transaction
+projects_script = load_script("02_backfill_projects.py")
+phases_script = load_script("03_backfill_phases.py")
+steps_script = load_script("04_extract_steps.py")
+
+# Input files
+projects_json = projects_script.projects_json
+phases_json = phases_script.phases_json
+
+def backfill_projects(cursor, data_dir, errors):
+    record_count, success_count = projects_script.backfill_projects(
+        cursor, os.path.join(data_dir, projects_json), errors
+    )
+    print(f"Processed {record_count} projects")
+    return {"record_count": record_count, "success_count": success_count}
+
+def backfill_phases(cursor, data_dir, errors):
+    record_count, success_count = phases_script.backfill_phases(
+        cursor, os.path.join(data_dir, phases_json), errors
+    )
+    print(f"Processed {record_count} phases")
+    return {"record_count": record_count, "success_count": success_count}
+
+def extract_steps(cursor, data_dir, errors):
+    candidates = (
+        phase for phase in iter_records(os.path.join(data_dir, phases_json))
+        if phase.get("notes") and phase.get("phaseid")
+    )
+    steps, extracted_count = steps_script.build_step_rows(map(steps_script.extract_from_phase, candidates))
+    cursor.execute(steps_script.STEPS_LOOKUP_INDEX)
+    _, success_count = insert_batches(cursor, steps_script.STEPS_INSERT_SQL, steps, "stepId", errors)
+
+    print(f"Extracted {extracted_count} potential steps, {len(steps)} unique")
+    return {
+        "total_extracted": extracted_count,
+        "unique_steps": len(steps),
+        "success_count": success_count,
+        "extraction_patterns": len(steps_script.STEP_NOTATIONS)
+    }
+
+def run_all(db_path, data_dir):
+    """
+    Run every backfill stage against db_path in a single transaction.
+    Returns (stats per target table, insert errors).
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        cursor = conn.cursor()
+
+        cursor.executescript(STAGING_PRAGMAS)
+
+        stats = {}
+        errors = []
+        # Commits once at the end, or rolls every stage back on an exception
+        with conn:
+            cursor.execute("BEGIN")
+            stats["projects_canonical"] = backfill_projects(cursor, data_dir, errors)
+            stats["phases_canonical"] = backfill_phases(cursor, data_dir, errors)
+            stats["steps_canonical"] = extract_steps(cursor, data_dir, errors)
+        return stats, errors
+    finally:
+        conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill projects, phases and steps into the canonical tables")
+    parser.add_argument("--db", default="oapp_staging.db", help="SQLite database with the canonical schema")
+    parser.add_argument("--data-dir", default=".", help="Directory holding the oApp JSON exports")
+    args = parser.parse_args()
+
+    try:
+        stats, errors = run_all(args.db, args.data_dir)
+
+        if errors:
+            dump_json(errors, "errors_canonical_migration.json")
+            print(f"⚠️  {len(errors)} records failed to insert, see errors_canonical_migration.json")
+
+        governance_entry = {
+            "timestamp": datetime.now().isoformat(),
+            "event_type": "canonical_migration",
+            "user_id": "system",
+            "user_role": "migration_script",
+            "resource_type": "oapp_canonical_schema",
+            "action": "backfill",
+            "success": True,
+            "details": {
+                "sources": [projects_json, phases_json],
+                "targets": stats,
+                "error_count": len(errors),
+                "phase": "staging"
+            }
+        }
+        dump_json(governance_entry, "governance_canonical_migration.json")
+
+        print(f"✅ Canonical backfill complete.")
+        print(f"   Governance log: governance_canonical_migration.json")
+
+    except Exception as e:
+        print(f"❌ Migration failed: {str(e)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Shared Helpers for the Canonical Migration Scripts
+Part of oApp Canonical Migration 2025-08-02
+
+JSON input/output, batching and bulk-load settings used by the numbered
+02–06 scripts and migrate.py.
+"""
+
+import importlib.util
+import json
+import os
+import sqlite3
+import sys
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Rows per executemany call
+BATCH_SIZE = 5000
+
+# Bulk-load tuning for the one-shot staging DB
+STAGING_PRAGMAS = """
+    PRAGMA journal_mode=WAL;
+    PRAGMA synchronous=NORMAL;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA cache_size=-65536;
+    PRAGMA locking_mode=EXCLUSIVE;
+"""
+
+# Staging-only tuning: no fsync and an in-memory journal. A crash mid-run can
+# leave the DB unusable, so rebuild it from the exports if that happens.
+UNSAFE_STAGING_PRAGMAS = """
+    PRAGMA journal_mode=MEMORY;
+    PRAGMA synchronous=OFF;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA cache_size=-200000;
+    PRAGMA locking_mode=EXCLUSIVE;
+"""
+
+# Child-side lookup indexes the orphan and distribution checks rely on (same
+# names as 01_create_canonical_tables.sql, so this is a no-op on a migrated DB).
+# The parent side is covered by the TEXT PRIMARY KEY autoindexes.
+VALIDATION_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_phases_project ON phases_canonical(project_ref)",
+    "CREATE INDEX IF NOT EXISTS idx_steps_phase ON steps_canonical(phase_ref)",
+    "CREATE INDEX IF NOT EXISTS idx_comms_project ON comms_canonical(projectId)",
+    "CREATE INDEX IF NOT EXISTS idx_comms_agent ON comms_canonical(agentType)",
+]
+
+def load_script(filename):
+    """Import one of the numbered migration scripts (not valid module names) as a module"""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), filename)
+    name = os.path.splitext(filename)[0]
+    spec = importlib.util.spec_from_file_location(f"migration_{name}", path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module  # lets worker processes unpickle its functions
+    spec.loader.exec_module(module)
+    return module
+
+def connect_staging(db_path):
+    """
+    Open db_path for a bulk load with UNSAFE_STAGING_PRAGMAS applied.
+    Autocommit mode, so callers issue BEGIN/COMMIT themselves; the larger
+    statement cache keeps every INSERT/SELECT prepared for the connection's life.
+    """
+    conn = sqlite3.connect(db_path, isolation_level=None, cached_statements=256)
+    conn.executescript(UNSAFE_STAGING_PRAGMAS)
+    return conn
+
+def load_json(path):
+    """Parse a JSON file, using orjson when available"""
+    if orjson is not None:
+        with open(path, "rb") as f:
+            return orjson.loads(f.read())
+    with open(path, "r") as f:
+        return json.load(f)
+
+def dump_json(obj, path):
+    """Write obj to path as indented JSON, using orjson when available"""
+    if orjson is not None:
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
+        return
+    with open(path, "w") as f:
+        json.dump(obj, f, indent=2)
+
+def iter_records(path):
+    """Yield the records of an export's "data" array, streaming when ijson is available"""
+    if ijson is None:
+        yield from load_json(path)["data"]
+        return
+    with open(path, "rb") as f:
+        yield from ijson.items(f, "data.item", use_float=True)
+
+def chunked(records, size=BATCH_SIZE):
+    """Group an iterable of records into lists of at most size items"""
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def insert_batches(cursor, insert_sql, rows, id_field, errors, size=BATCH_SIZE):
+    """
+    executemany rows in batches, one savepoint each, inside the caller's
+    transaction. A batch that hits any sqlite3.Error (constraint failures,
+    or values such as nested dicts that can't be bound) is retried row by row
+    so one bad record doesn't sink the rest of it.
+    Returns (record_count, success_count); failures are appended to errors.
+    """
+    record_count = 0
+    success_count = 0
+    for batch in chunked(rows, size):
+        record_count += len(batch)
+        cursor.execute("SAVEPOINT batch")
+        try:
+            cursor.executemany(insert_sql, batch)
+            success_count += len(batch)
+        except sqlite3.Error:
+            cursor.execute("ROLLBACK TO batch")
+            for row in batch:
+                try:
+                    cursor.execute(insert_sql, row)
+                    success_count += 1
+                except Exception as e:
+                    errors.append({id_field: row[0], "error": str(e)})
+        cursor.execute("RELEASE batch")
+    return record_count, success_count
@@ -6,13 +6,23 @@ Date: 2025-08-02
 Purpose: Import canonical Projects and Phases from Notion CSV/JSON sources
 """
 
-import pandas as pd
+import csv
 import sqlite3
 import json
 import sys
 import os
 from datetime import datetime
 
+# Shared staging helpers live one level up, in oapp-canonical-migration
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from migration_common import connect_staging
+
+def iter_csv(path):
+    """Stream rows of a Notion CSV export as dicts; missing cells read as empty strings"""
+    # utf-8-sig drops the BOM Notion writes ahead of the first header
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        yield from csv.DictReader(f, restval="")
+
 def main():
     # Configuration
     DB_PATH = "oapp_staging.db"
@@ -32,7 +42,7 @@ def main():
     
     # Connect to database
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = connect_staging(DB_PATH)
         cursor = conn.cursor()
         print(f"✅ Connected to database: {DB_PATH}")
     except Exception as e:
@@ -40,27 +50,19 @@ def main():
         sys.exit(1)
     
     try:
-        # Load Notion canonical data
-        print(f"📁 Loading {PROJECTS_CSV}...")
-        projects_df = pd.read_csv(PROJECTS_CSV)
-        print(f"   Loaded {len(projects_df)} projects")
-        
-        print(f"📁 Loading {PHASES_CSV}...")
-        phases_df = pd.read_csv(PHASES_CSV)
-        print(f"   Loaded {len(phases_df)} phases")
+        # Both tables load in one transaction
+        cursor.execute("BEGIN")
         
-        # Import projects with proper field mapping
-        print("🔄 Importing projects to projects_canonical...")
-        projects_imported = 0
-        
-        for _, row in projects_df.iterrows():
-            cursor.execute("""
-                INSERT INTO projects_canonical
-                (projectId, projectName, owner, status, goals, description, aiPromptLog, 
-                 keyTasks, tags, scopeNotes, govLog, checkpointReview, claudeGizmoExchange, 
-                 createdAt, updatedAt)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'), datetime('now'))
-            """, (
+        # Import projects with proper field mapping; rows stream from the CSV into executemany
+        print(f"🔄 Importing {PROJECTS_CSV} to projects_canonical...")
+        cursor.executemany("""
+            INSERT INTO projects_canonical
+            (projectId, projectName, owner, status, goals, description, aiPromptLog, 
+             keyTasks, tags, scopeNotes, govLog, checkpointReview, claudeGizmoExchange, 
+             createdAt, updatedAt)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'), datetime('now'))
+        """, (
+            (
                 row.get('projectID', ''),
                 row.get('Title', ''),
                 row.get('owner', ''),
@@ -74,21 +76,21 @@ def main():
                 row.get('GovLog', ''),
                 row.get('CheckpointReview', ''),
                 row.get('claude-gizmo-exchange', '')
-            ))
-            projects_imported += 1
+            )
+            for row in iter_csv(PROJECTS_CSV)
+        ))
+        projects_imported = cursor.rowcount
         
         print(f"   ✅ Imported {projects_imported} projects")
         
         # Import phases with proper project mapping
-        print("🔄 Importing phases to phases_canonical...")
-        phases_imported = 0
-        
-        for _, row in phases_df.iterrows():
-            cursor.execute("""
-                INSERT INTO phases_canonical
-                (phaseId, phaseName, project_ref, status, RAG, startDate, endDate, notes)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
+        print(f"🔄 Importing {PHASES_CSV} to phases_canonical...")
+        cursor.executemany("""
+            INSERT INTO phases_canonical
+            (phaseId, phaseName, project_ref, status, RAG, startDate, endDate, notes)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            (
                 row.get('phaseid', ''),
                 row.get('phasename', ''),
                 row.get('WT Projects', ''),  # Foreign key to projects
@@ -97,8 +99,10 @@ def main():
                 row.get('startDate', ''),
                 row.get('endDate', ''),
                 row.get('notes', '')
-            ))
-            phases_imported += 1
+            )
+            for row in iter_csv(PHASES_CSV)
+        ))
+        phases_imported = cursor.rowcount
         
         print(f"   ✅ Imported {phases_imported} phases")
         
@@ -6,120 +6,134 @@ Date: 2025-08-02
 Purpose: Extract steps from phase notes using enhanced regex patterns
 """
 
-import pandas as pd
-import sqlite3
+import os
 import re
 import sys
 from datetime import datetime
 
+# Shared staging helpers live one level up, in oapp-canonical-migration
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from migration_common import connect_staging
+
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+# Step rows held in memory before each flush
+BATCH_SIZE = 10_000
+
+INSERT_SQL = """
+    INSERT INTO steps_canonical
+    (stepId, stepName, phase_ref, project_ref, status, outputNotes, createdAt, updatedAt)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Enhanced step notations, fused into one alternation so each phase's notes
+# are scanned once. Earlier alternatives win where two match at the same spot.
+STEP_NOTATIONS = [
+    r"StepTaskOutput\s*\d+\.\d+[a-zA-Z]*",  # StepTaskOutput 1.1, 1.1a, etc.
+    r"WT-\d+\.\d+[a-zA-Z]*\s*Step",        # WT-1.1 Step, WT-1.1a Step
+    r"Step\s*\d+\.\d+[a-zA-Z]*",           # Step 1.1, Step 1.1a
+    r"Task\s*\d+\.\d+[a-zA-Z]*",           # Task 1.1, Task 1.1a
+    r"\d+\.\d+[a-zA-Z]*\s*-\s*[A-Za-z]+", # 1.1 - Description
+    r"Milestone\s*\d+\.\d+[a-zA-Z]*",      # Milestone 1.1
+]
+# RE2 (google-re2) scans in linear time with no backtracking when installed.
+# Flags are inline because RE2 takes an Options object instead of re flags.
+STEP_RE = (re2 if re2 is not None else re).compile(
+    "(?im)" + "|".join(f"(?:{notation})" for notation in STEP_NOTATIONS)
+)
+
+def build_step_rows(step_names, phase_id, project_ref, step_status, output_notes, start_counter, created_at):
+    """Row tuples for one phase's step names, numbered from start_counter"""
+    return [
+        (
+            f"{phase_id}-S{counter:03d}",
+            step_name if len(step_name) <= 200 else step_name[:197] + "...",  # Truncate very long names
+            phase_id,
+            project_ref,
+            step_status,
+            output_notes,
+            created_at,
+            created_at
+        )
+        for counter, step_name in enumerate(step_names, start_counter)
+    ]
+
 def main():
     # Configuration
     DB_PATH = "oapp_staging.db"
     
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = connect_staging(DB_PATH)
         print(f"✅ Connected to database: {DB_PATH}")
     except Exception as e:
         print(f"❌ Database connection failed: {e}")
         sys.exit(1)
     
     try:
-        # Load phases from canonical table
-        print("📁 Loading phases from phases_canonical...")
-        phases_df = pd.read_sql_query("SELECT * FROM phases_canonical", conn)
-        print(f"   Loaded {len(phases_df)} phases for step extraction")
-        
-        # Enhanced regex patterns for step detection
-        step_patterns = [
-            r"(StepTaskOutput\s*\d+\.\d+[a-zA-Z]*)",  # StepTaskOutput 1.1, 1.1a, etc.
-            r"(WT-\d+\.\d+[a-zA-Z]*\s*Step)",        # WT-1.1 Step, WT-1.1a Step
-            r"(Step\s*\d+\.\d+[a-zA-Z]*)",           # Step 1.1, Step 1.1a
-            r"(Task\s*\d+\.\d+[a-zA-Z]*)",           # Task 1.1, Task 1.1a
-            r"(\d+\.\d+[a-zA-Z]*\s*-\s*[A-Za-z]+)", # 1.1 - Description
-            r"(Milestone\s*\d+\.\d+[a-zA-Z]*)",      # Milestone 1.1
-        ]
-        
-        steps = []
+        steps = []  # Pending row tuples in steps_canonical column order
         step_counter = 1
+        inserted_count = 0
+        now_iso = datetime.now().isoformat()  # Shared createdAt/updatedAt for this run
         
         print("🔍 Extracting steps using enhanced regex patterns...")
         
-        for _, phase_row in phases_df.iterrows():
-            phase_id = phase_row.get('phaseId', '')
-            project_ref = phase_row.get('project_ref', '')
-            notes = phase_row.get('notes', '') or ""
-            phase_status = phase_row.get('status', 'pending')
+        # One transaction for the whole run; rows are flushed every BATCH_SIZE
+        # while phases are still being read, so they never pile up in memory
+        cursor = conn.cursor()
+        cursor.execute("BEGIN")
+        
+        # Stream phases from the canonical table, reading only the columns used here
+        phase_count = 0
+        phases = conn.execute("SELECT phaseId, project_ref, notes FROM phases_canonical")
+        for phase_id, project_ref, notes in phases:
+            phase_count += 1
             
-            if not notes.strip():
+            # Skip NULL, blank and too-short notes without allocating a stripped copy;
+            # the shortest step notation ("1.1-a") is five characters
+            if not notes or len(notes) < 5 or notes.isspace():
                 continue
             
-            # Apply all regex patterns
-            found_steps = set()  # Use set to avoid duplicates
+            # Single pass over the notes for every step notation; set avoids duplicates
+            found_steps = {match.strip() for match in STEP_RE.findall(notes)}
+            if not found_steps:
+                continue
             
-            for pattern in step_patterns:
-                matches = re.findall(pattern, notes, re.IGNORECASE | re.MULTILINE)
-                for match in matches:
-                    if isinstance(match, tuple):
-                        match = match[0]  # Extract from tuple if needed
-                    found_steps.add(match.strip())
+            # Step status depends only on the phase notes, so classify once per phase
+            notes_lower = notes.lower()
+            step_status = "pending"
+            if "complete" in notes_lower or "done" in notes_lower:
+                step_status = "completed"
+            elif "progress" in notes_lower or "working" in notes_lower:
+                step_status = "in_progress"
             
             # Create step records
-            for step_match in found_steps:
-                step_id = f"{phase_id}-S{step_counter:03d}"
-                
-                # Extract step name and clean it
-                step_name = step_match
-                if len(step_name) > 200:  # Truncate very long names
-                    step_name = step_name[:197] + "..."
-                
-                # Determine step status based on context
-                step_status = "pending"
-                if "complete" in notes.lower() or "done" in notes.lower():
-                    step_status = "completed"
-                elif "progress" in notes.lower() or "working" in notes.lower():
-                    step_status = "in_progress"
-                
-                steps.append({
-                    "stepId": step_id,
-                    "stepName": step_name,
-                    "phase_ref": phase_id,
-                    "project_ref": project_ref,
-                    "status": step_status,
-                    "outputNotes": notes[:1000],  # Truncate notes to avoid overflow
-                    "createdAt": datetime.now().isoformat(),
-                    "updatedAt": datetime.now().isoformat()
-                })
-                
-                step_counter += 1
+            phase_steps = build_step_rows(
+                found_steps, phase_id, project_ref, step_status,
+                notes[:1000],  # Truncate notes to avoid overflow
+                step_counter, now_iso
+            )
+            steps.extend(phase_steps)
+            step_counter += len(phase_steps)
+            
+            print(f"   Phase {phase_id}: Found {len(found_steps)} steps")
             
-            if found_steps:
-                print(f"   Phase {phase_id}: Found {len(found_steps)} steps")
+            if len(steps) >= BATCH_SIZE:
+                cursor.executemany(INSERT_SQL, steps)
+                inserted_count += len(steps)
+                steps.clear()
         
-        # Convert to DataFrame and insert into database
         if steps:
-            print(f"\n📊 Preparing to insert {len(steps)} steps...")
-            steps_df = pd.DataFrame(steps)
-            
-            # Insert steps into database
-            cursor = conn.cursor()
-            for _, step_row in steps_df.iterrows():
-                cursor.execute("""
-                    INSERT INTO steps_canonical
-                    (stepId, stepName, phase_ref, project_ref, status, outputNotes, createdAt, updatedAt)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    step_row['stepId'],
-                    step_row['stepName'],
-                    step_row['phase_ref'],
-                    step_row['project_ref'],
-                    step_row['status'],
-                    step_row['outputNotes'],
-                    step_row['createdAt'],
-                    step_row['updatedAt']
-                ))
-            
-            conn.commit()
-            print(f"   ✅ Inserted {len(steps)} steps into steps_canonical")
+            cursor.executemany(INSERT_SQL, steps)
+            inserted_count += len(steps)
+        conn.commit()
+        
+        print(f"   Scanned {phase_count} phases from phases_canonical")
+        
+        if inserted_count:
+            print(f"   ✅ Inserted {inserted_count} steps into steps_canonical")
             
             # Validation
             step_count = cursor.execute("SELECT COUNT(*) FROM steps_canonical").fetchone()[0]
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Step Extraction Tests
+Checks the fused step patterns against each notation compiled on its own
+
+Run from oapp-canonical-migration: python3 -m unittest discover tests
+"""
+
+import importlib.util
+import os
+import re
+import sys
+import unittest
+
+MIGRATION_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, MIGRATION_DIR)
+
+from migration_common import load_script
+
+extract_steps = load_script("04_extract_steps.py")
+
+_advanced_spec = importlib.util.spec_from_file_location(
+    "extract_steps_advanced",
+    os.path.join(MIGRATION_DIR, "oapp_canonical_rebuild_20250802", "03_extract_steps_advanced.py")
+)
+extract_steps_advanced = importlib.util.module_from_spec(_advanced_spec)
+_advanced_spec.loader.exec_module(extract_steps_advanced)
+
+def joined_groups(match):
+    """Step name as extract_from_phase builds it, before cleaning"""
+    return " ".join(g for g in match.groups() if g).strip()
+
+class FusedStepPatternTest(unittest.TestCase):
+    """04_extract_steps.py: one alternation in place of a pattern per notation"""
+
+    # One sample line per entry of STEP_NOTATIONS, in the same order
+    SAMPLES = [
+        "StepTaskOutput1.1 Build the canonical importer",
+        "Step 2.3: Wire up the validation report",
+        "4.2 Deploy the staging database",
+        "✅ Migrated the governance logs",
+    ]
+
+    def test_each_notation_matches_like_its_own_pattern(self):
+        self.assertEqual(len(self.SAMPLES), len(extract_steps.STEP_NOTATIONS))
+        for notation, sample in zip(extract_steps.STEP_NOTATIONS, self.SAMPLES):
+            with self.subTest(sample=sample):
+                alone = re.compile(notation, re.IGNORECASE).search(sample)
+                fused = extract_steps.STEP_PATTERN.search(sample)
+                self.assertIsNotNone(alone)
+                self.assertEqual(fused.span(), alone.span())
+                self.assertEqual(joined_groups(fused), joined_groups(alone))
+
+    def test_fused_scan_finds_every_line_once(self):
+        notes = "\n".join(self.SAMPLES)
+        names = [joined_groups(m) for m in extract_steps.STEP_PATTERN.finditer(notes)]
+        self.assertEqual(names, [
+            "1.1 Build the canonical importer",
+            "2.3 Wire up the validation report",
+            "4.2 Deploy the staging database",
+            "Migrated the governance logs",
+        ])
+
+    def test_earlier_notation_wins_at_the_same_position(self):
+        # The bare "1.1 Description" notation would also match inside this line
+        matches = list(extract_steps.STEP_PATTERN.finditer("Step 1.1: Create canonical tables"))
+        self.assertEqual(len(matches), 1)
+        self.assertEqual(matches[0].group("step_num"), "1.1")
+        self.assertEqual(matches[0].group("step_text"), "Create canonical tables")
+
+    def test_notations_ignore_case(self):
+        match = extract_steps.STEP_PATTERN.search("step 3.1: lower case heading")
+        self.assertEqual(match.group("step_num"), "3.1")
+
+    def test_extract_from_phase(self):
+        phase = {
+            "phaseid": "OF-1.1",
+            "WT Projects": "OF-SDLC",
+            "status": "In Progress",
+            "notes": "Step 1.1: Create canonical tables\n🔄 Backfill the phases (draft)",
+        }
+        phase_id, project_ref, status, steps = extract_steps.extract_from_phase(phase)
+        self.assertEqual((phase_id, project_ref, status), ("OF-1.1", "OF-SDLC", "In Progress"))
+        self.assertEqual([name for name, _ in steps], [
+            "1.1 Create canonical tables",
+            "Backfill the phases (draft)",
+        ])
+
+    def test_phase_without_notes_yields_no_steps(self):
+        self.assertEqual(extract_steps.extract_from_phase({"phaseid": "OF-1.1"})[3], [])
+
+    def test_clean_step_name_matches_regex_cleanup(self):
+        for name in ["Ship it! (v2) #1", "Naïve café — ünïcode ✅", "plain name"]:
+            with self.subTest(name=name):
+                self.assertEqual(
+                    extract_steps.clean_step_name(name),
+                    extract_steps.CLEAN_PATTERN.sub("", name)
+                )
+
+    def test_output_notes_keep_only_the_match_context(self):
+        notes = "x" * 500 + "\nStep 9.9: The step we want\n" + "y" * 500
+        _, _, _, steps = extract_steps.extract_from_phase({"phaseid": "OF-9", "notes": notes})
+        (name, output_notes), = steps
+        self.assertEqual(name, "9.9 The step we want")
+        self.assertIn("Step 9.9: The step we want", output_notes)
+        self.assertLessEqual(
+            len(output_notes),
+            extract_steps.NOTES_CONTEXT_BEFORE + len("Step 9.9: The step we want") + extract_steps.NOTES_CONTEXT_AFTER
+        )
+
+class BuildStepRowsTest(unittest.TestCase):
+
+    def test_numbering_counts_short_matches_and_dedup_keeps_first(self):
+        results = [
+            ("P1", "PR1", "Planned", [
+                ("short", "n1"),
+                ("Create canonical tables", "n2"),
+                ("Create canonical tables", "n3"),
+            ]),
+            ("P2", "PR1", "Done", [("Create canonical tables", "n4")]),
+        ]
+        rows, extracted_count = extract_steps.build_step_rows(results)
+        self.assertEqual(extracted_count, 3)
+        self.assertEqual(rows, [
+            ("P1-2", "Create canonical tables", "P1", "PR1", "Planned", "n2"),
+            ("P2-4", "Create canonical tables", "P2", "PR1", "Done", "n4"),
+        ])
+
+class AdvancedStepPatternTest(unittest.TestCase):
+    """03_extract_steps_advanced.py: the same fusion, optionally compiled with RE2"""
+
+    SAMPLES = [
+        "StepTaskOutput 1.1a",
+        "WT-2.1 Step",
+        "Step 3.2b",
+        "Task 4.1",
+        "5.1 - Deploy",
+        "Milestone 6.1",
+    ]
+
+    def test_each_notation_matches_like_its_own_pattern(self):
+        self.assertEqual(len(self.SAMPLES), len(extract_steps_advanced.STEP_NOTATIONS))
+        for notation, sample in zip(extract_steps_advanced.STEP_NOTATIONS, self.SAMPLES):
+            with self.subTest(sample=sample):
+                alone = re.compile(notation, re.IGNORECASE | re.MULTILINE).findall(sample)
+                self.assertEqual(alone, [sample])
+                self.assertEqual(extract_steps_advanced.STEP_RE.findall(sample), alone)
+
+    def test_fused_scan_over_mixed_notes(self):
+        notes = "Intro text\n" + "\n".join(self.SAMPLES) + "\nmilestone 7.1 done"
+        self.assertEqual(
+            extract_steps_advanced.STEP_RE.findall(notes),
+            self.SAMPLES + ["milestone 7.1"]
+        )
+
+if __name__ == "__main__":
+    unittest.main()
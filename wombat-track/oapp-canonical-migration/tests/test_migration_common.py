@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Shared Migration Helper Tests
+Batching, the row-by-row sqlite3.Error fallback and the 02/03 loaders built on it
+
+Run from oapp-canonical-migration: python3 -m unittest discover tests
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+MIGRATION_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, MIGRATION_DIR)
+
+from migration_common import chunked, insert_batches, iter_records, load_script
+
+INSERT_SQL = "INSERT INTO items (id, name) VALUES (?, ?)"
+
+def canonical_db():
+    """In-memory DB with the canonical schema, autocommit so tests control transactions"""
+    conn = sqlite3.connect(":memory:", isolation_level=None)
+    with open(os.path.join(MIGRATION_DIR, "01_create_canonical_tables.sql")) as f:
+        conn.executescript(f.read())
+    return conn
+
+class ChunkedTest(unittest.TestCase):
+
+    def test_last_chunk_holds_the_remainder(self):
+        self.assertEqual(list(chunked(range(5), 2)), [[0, 1], [2, 3], [4]])
+
+    def test_empty_input_yields_nothing(self):
+        self.assertEqual(list(chunked([], 2)), [])
+
+class InsertBatchesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:", isolation_level=None)
+        self.conn.execute("CREATE TABLE items (id TEXT PRIMARY KEY, name TEXT NOT NULL)")
+        self.cursor = self.conn.cursor()
+
+    def tearDown(self):
+        self.conn.close()
+
+    def stored_ids(self):
+        return [row[0] for row in self.conn.execute("SELECT id FROM items ORDER BY id")]
+
+    def test_clean_rows_insert_in_batches(self):
+        errors = []
+        self.cursor.execute("BEGIN")
+        counts = insert_batches(self.cursor, INSERT_SQL, ((str(i), "x") for i in range(5)), "id", errors, size=2)
+        self.cursor.execute("COMMIT")
+        self.assertEqual(counts, (5, 5))
+        self.assertEqual(errors, [])
+        self.assertEqual(self.stored_ids(), ["0", "1", "2", "3", "4"])
+
+    def test_integrity_error_falls_back_to_row_by_row(self):
+        rows = [("a", "A"), ("b", None), ("c", "C"), ("c", "duplicate"), ("e", "E")]
+        errors = []
+        self.cursor.execute("BEGIN")
+        counts = insert_batches(self.cursor, INSERT_SQL, iter(rows), "id", errors, size=2)
+        self.cursor.execute("COMMIT")
+
+        # Only the failing rows are lost; the rest of their batches still land
+        self.assertEqual(counts, (5, 3))
+        self.assertEqual(self.stored_ids(), ["a", "c", "e"])
+        self.assertEqual([error["id"] for error in errors], ["b", "c"])
+        self.assertIn("NOT NULL", errors[0]["error"])
+        self.assertIn("UNIQUE", errors[1]["error"])
+
+    def test_unbindable_values_fall_back_to_row_by_row(self):
+        # Nested JSON values can't be bound as SQLite parameters
+        rows = [("a", "A"), ("b", {"nested": True}), ("c", ["list"]), ("d", "D")]
+        errors = []
+        self.cursor.execute("BEGIN")
+        counts = insert_batches(self.cursor, INSERT_SQL, iter(rows), "id", errors, size=2)
+        self.cursor.execute("COMMIT")
+
+        self.assertEqual(counts, (4, 2))
+        self.assertEqual(self.stored_ids(), ["a", "d"])
+        self.assertEqual([error["id"] for error in errors], ["b", "c"])
+
+    def test_runs_inside_the_callers_transaction(self):
+        errors = []
+        self.cursor.execute("BEGIN")
+        insert_batches(self.cursor, INSERT_SQL, [("a", "A"), ("b", None)], "id", errors)
+        self.cursor.execute("ROLLBACK")
+        self.assertEqual(self.stored_ids(), [])
+
+class BackfillScriptsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.conn = canonical_db()
+        self.cursor = self.conn.cursor()
+
+    def tearDown(self):
+        self.conn.close()
+        self.tmpdir.cleanup()
+
+    def write_export(self, records):
+        path = os.path.join(self.tmpdir.name, "export.json")
+        with open(path, "w") as f:
+            json.dump({"data": records}, f)
+        return path
+
+    def test_iter_records_reads_the_data_array(self):
+        path = self.write_export([{"id": 1}, {"id": 2}])
+        self.assertEqual(list(iter_records(path)), [{"id": 1}, {"id": 2}])
+
+    def test_backfill_phases_reports_rows_that_break_constraints(self):
+        backfill_phases = load_script("03_backfill_phases.py").backfill_phases
+        path = self.write_export([
+            {"phaseid": "P1", "phasename": "Design", "WT Projects": "PR1"},
+            {"phaseid": "P2"},  # phasename is NOT NULL
+            {"phaseid": "P3", "phasename": "Build", "status": "In Progress"},
+        ])
+
+        errors = []
+        self.cursor.execute("BEGIN")
+        counts = backfill_phases(self.cursor, path, errors)
+        self.cursor.execute("COMMIT")
+
+        self.assertEqual(counts, (3, 2))
+        self.assertEqual([error["phaseId"] for error in errors], ["P2"])
+        self.assertEqual(
+            self.conn.execute("SELECT phaseId, project_ref, status FROM phases_canonical ORDER BY phaseId").fetchall(),
+            [("P1", "PR1", "Planned"), ("P3", "", "In Progress")]
+        )
+
+    def test_backfill_projects_applies_defaults(self):
+        backfill_projects = load_script("02_backfill_projects.py").backfill_projects
+        path = self.write_export([{"projectId": "PR1", "projectName": "Rebuild"}])
+
+        errors = []
+        self.cursor.execute("BEGIN")
+        counts = backfill_projects(self.cursor, path, errors)
+        self.cursor.execute("COMMIT")
+
+        self.assertEqual(counts, (1, 1))
+        self.assertEqual(errors, [])
+        self.assertEqual(
+            self.conn.execute("SELECT projectId, projectName, owner, status FROM projects_canonical").fetchall(),
+            [("PR1", "Rebuild", "", "Planning")]
+        )
+
+if __name__ == "__main__":
+    unittest.main()
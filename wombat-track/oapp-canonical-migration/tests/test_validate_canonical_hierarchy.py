@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Canonical Hierarchy Validator Tests
+Runs oapp_canonical_rebuild_20250802/04_validate_canonical_hierarchy.py with and without --fast-fail
+
+Run from oapp-canonical-migration: python3 -m unittest discover tests
+"""
+
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import unittest
+
+MIGRATION_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+VALIDATOR = os.path.join(MIGRATION_DIR, "oapp_canonical_rebuild_20250802", "04_validate_canonical_hierarchy.py")
+
+SECTIONS = [
+    "1. ROW COUNT VALIDATION",
+    "2. ORPHAN DETECTION",
+    "3. DATA QUALITY CHECKS",
+    "4. HIERARCHY INTEGRITY",
+    "5. SUMMARY STATISTICS",
+]
+SKIPPED = "--fast-fail: skipping remaining checks"
+
+class HierarchyValidatorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.conn = sqlite3.connect(os.path.join(self.tmpdir.name, "oapp_staging.db"))
+        self.addCleanup(self.conn.close)
+        with open(os.path.join(MIGRATION_DIR, "01_create_canonical_tables.sql")) as f:
+            self.conn.executescript(f.read())
+
+    def load_hierarchy(self, phases_per_project):
+        """One project per entry with that many phases, and one step under each phase"""
+        for p, phase_count in enumerate(phases_per_project):
+            project_id = f"PR{p}"
+            self.conn.execute(
+                "INSERT INTO projects_canonical (projectId, projectName, owner, status) VALUES (?, ?, 'ops', 'Active')",
+                (project_id, f"Project {p}")
+            )
+            for n in range(phase_count):
+                phase_id = f"{project_id}-PH{n}"
+                self.conn.execute(
+                    "INSERT INTO phases_canonical (phaseId, phaseName, project_ref) VALUES (?, ?, ?)",
+                    (phase_id, f"Phase {n}", project_id)
+                )
+                self.conn.execute(
+                    "INSERT INTO steps_canonical (stepId, stepName, phase_ref, project_ref) VALUES (?, ?, ?, ?)",
+                    (f"{phase_id}-S001", "Step 1.1 Build", phase_id, project_id)
+                )
+        self.conn.commit()
+
+    def run_validator(self, *args):
+        result = subprocess.run(
+            [sys.executable, VALIDATOR, *args],
+            cwd=self.tmpdir.name, capture_output=True, text=True, timeout=60
+        )
+        return result.returncode, result.stdout
+
+    def sections_run(self, output):
+        return [section for section in SECTIONS if section in output]
+
+    def test_valid_hierarchy_passes_with_fast_fail(self):
+        # 18 projects and 38 phases, as the validator expects
+        self.load_hierarchy([3, 3] + [2] * 16)
+        code, output = self.run_validator("--fast-fail")
+        self.assertEqual(code, 0, output)
+        self.assertEqual(self.sections_run(output), SECTIONS)
+        self.assertNotIn(SKIPPED, output)
+        self.assertIn("VALIDATION PASSED", output)
+
+    def test_fast_fail_stops_after_failed_row_counts(self):
+        self.load_hierarchy([1, 1])
+        code, output = self.run_validator("--fast-fail")
+        self.assertEqual(code, 1)
+        self.assertEqual(self.sections_run(output), SECTIONS[:1])
+        self.assertIn(SKIPPED, output)
+        self.assertIn("Projects count mismatch", output)
+        self.assertIn("VALIDATION FAILED", output)
+
+    def test_fast_fail_stops_after_failed_orphan_check(self):
+        self.load_hierarchy([3, 3] + [2] * 16)
+        self.conn.execute("INSERT INTO steps_canonical (stepId, stepName, phase_ref) VALUES ('X-S001', 'Lost', 'MISSING')")
+        self.conn.commit()
+        code, output = self.run_validator("--fast-fail")
+        self.assertEqual(code, 1)
+        self.assertEqual(self.sections_run(output), SECTIONS[:2])
+        self.assertIn("Found 1 orphaned steps", output)
+
+    def test_without_fast_fail_every_section_runs(self):
+        self.load_hierarchy([1, 1])
+        code, output = self.run_validator()
+        self.assertEqual(code, 1)
+        self.assertEqual(self.sections_run(output), SECTIONS)
+        self.assertNotIn(SKIPPED, output)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Migration Validation Tests
+Runs 06_validate_migration*.py against small staging DBs with and without orphans
+
+Run from oapp-canonical-migration: python3 -m unittest discover tests
+"""
+
+import contextlib
+import io
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+MIGRATION_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, MIGRATION_DIR)
+
+from migration_common import VALIDATION_INDEXES, load_script
+
+SCRIPTS = ["06_validate_migration.py", "06_validate_migration_simple.py"]
+
+class ValidateMigrationTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        cwd = os.getcwd()
+        os.chdir(self.tmpdir.name)
+        self.addCleanup(os.chdir, cwd)
+
+        # Staging DB without the validation indexes, as after a bare table load
+        conn = sqlite3.connect("oapp_staging.db")
+        with open(os.path.join(MIGRATION_DIR, "01_create_canonical_tables.sql")) as f:
+            conn.executescript(f.read())
+        for name in self.index_names():
+            conn.execute(f"DROP INDEX {name}")
+        conn.executescript("""
+            INSERT INTO projects_canonical (projectId, projectName) VALUES ('PR1', 'Rebuild');
+            INSERT INTO phases_canonical (phaseId, phaseName, project_ref) VALUES ('P1', 'Design', 'PR1');
+            INSERT INTO steps_canonical (stepId, stepName, phase_ref) VALUES ('P1-1', 'Create tables', 'P1');
+            INSERT INTO comms_canonical (agentType, projectId) VALUES ('Claude', 'PR1');
+        """)
+        conn.commit()
+        conn.close()
+
+    @staticmethod
+    def index_names():
+        return [statement.split()[5] for statement in VALIDATION_INDEXES]
+
+    def validate(self, script):
+        with contextlib.redirect_stdout(io.StringIO()):
+            passed = load_script(script).validate_migration()
+        with open("validation_report.json") as f:
+            return passed, json.load(f)
+
+    def add_orphans(self):
+        conn = sqlite3.connect("oapp_staging.db")
+        conn.executescript("""
+            INSERT INTO phases_canonical (phaseId, phaseName, project_ref) VALUES ('P2', 'Orphan', 'MISSING');
+            INSERT INTO steps_canonical (stepId, stepName, phase_ref) VALUES ('PX-1', 'Orphan step', 'PX');
+            INSERT INTO steps_canonical (stepId, stepName, phase_ref) VALUES ('PX-2', 'Unlinked step', '');
+            INSERT INTO comms_canonical (agentType, projectId) VALUES ('Gizmo', 'MISSING');
+        """)
+        conn.commit()
+        conn.close()
+
+    def test_clean_migration_passes_and_builds_indexes(self):
+        for script in SCRIPTS:
+            with self.subTest(script=script):
+                passed, report = self.validate(script)
+                self.assertTrue(passed)
+                self.assertEqual(report["validation_status"], "PASS")
+                self.assertEqual(report["results"]["agent_distribution"], {"Claude": 1})
+
+                conn = sqlite3.connect("oapp_staging.db")
+                indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+                conn.close()
+                self.assertLessEqual(set(self.index_names()), indexes)
+
+    def test_orphans_are_counted_as_warnings(self):
+        self.add_orphans()
+        for script in SCRIPTS:
+            with self.subTest(script=script):
+                passed, report = self.validate(script)
+                self.assertFalse(passed)
+                self.assertEqual(report["validation_status"], "WARNINGS")
+                results = report["results"]
+                # Blank phase_ref is unlinked, not orphaned
+                self.assertEqual(
+                    (results["orphaned_phases"], results["orphaned_steps"], results["orphaned_comms_projects"]),
+                    (1, 1, 1)
+                )
+                self.assertEqual(report["total_issues"], 3)
+                self.assertEqual(results["steps_canonical_count"], 3)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,48 +5,150 @@ Direct integration with local OF Integration Service
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Dict, Any, List, Optional
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from cachetools import TTLCache
+except ImportError:
+    TTLCache = None
+
+def _json(response: requests.Response) -> Any:
+    """Decode a response body, using orjson when available; an empty body decodes to {}"""
+    if not response.content:
+        return {}
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
+
+def _unix_seconds(ts_ns: int) -> int:
+    return ts_ns // 1_000_000_000
+
+@dataclass(frozen=True)
+class DemoContext:
+    """Project, phase and telemetry session shared by every call in one integration session"""
+    project_id: str = "OF-SDLC-IMP2"
+    phase_id: str = "OF-8.8"
+    started_ns: int = field(default_factory=time.time_ns)
+    session_id: str = ""
+    
+    def __post_init__(self) -> None:
+        # The session suffix comes from the same clock read as started_ns
+        if not self.session_id:
+            object.__setattr__(self, "session_id", f"openai_{_unix_seconds(self.started_ns)}")
+
 class OpenAIoAppIntegration:
     
-    def __init__(self, base_url: str = "http://localhost:3001"):
+    def __init__(self, base_url: str = "http://localhost:3001", cache_ttl: float = 30, cache_maxsize: int = 256,
+                 flush_threshold: int = 32, context: Optional[DemoContext] = None):
         self.base_url = base_url
+        self.context = context or DemoContext()
+        
+        # Governance entries queued with queue_governance_entry() go out in one
+        # bulk POST once flush_threshold are pending, or on flush()/close()
+        self.flush_threshold = flush_threshold
+        self._governance_buffer: List[Dict[str, Any]] = []
+        self._buffer_lock = threading.Lock()
+        
+        # Short-lived cache of successful read results (health, governance queries,
+        # RAG answers) so agent loops repeating a call don't re-hit the service.
+        # Needs cachetools; without it every call goes to the service.
+        self._cache = TTLCache(maxsize=cache_maxsize, ttl=cache_ttl) if TTLCache is not None else None
+        self._cache_lock = threading.Lock()
+        
+        # Keep-alive pool sized for concurrent callers; retries cover a restarting service
         self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=32,
+            pool_maxsize=32,
+            max_retries=Retry(total=2, backoff_factor=0.1, status_forcelist=(502, 503, 504))
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
         self.session.headers.update({
             'Content-Type': 'application/json',
             'User-Agent': 'OpenAI-oApp-Integration/1.0'
         })
     
+    def _cache_get(self, key: tuple) -> Optional[Dict[str, Any]]:
+        if self._cache is None:
+            return None
+        # TTLCache isn't thread-safe, and the demo calls in from a thread pool
+        with self._cache_lock:
+            value = self._cache.get(key)
+        # Hand out a copy so callers can't rewrite the cached result
+        return dict(value) if value is not None else None
+    
+    def _cache_set(self, key: tuple, value: Dict[str, Any]) -> Dict[str, Any]:
+        """Cache a copy of value if the call succeeded; returns value for chaining"""
+        if self._cache is not None and value["status"] == "success":
+            with self._cache_lock:
+                self._cache[key] = dict(value)
+        return value
+    
+    def _invalidate_governance_queries(self) -> None:
+        """Drop cached governance query results so the next query sees a write"""
+        if self._cache is None:
+            return
+        with self._cache_lock:
+            for key in [key for key in self._cache if key[0] == "governance"]:
+                self._cache.pop(key, None)
+    
     def health_check(self) -> Dict[str, Any]:
         """Check if the OF Integration Service is healthy"""
+        cache_key = ("health",)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
+            # Wall-clock round trip from this side, timed with the monotonic high-resolution clock
+            t0 = time.perf_counter_ns()
             response = self.session.get(f"{self.base_url}/health")
-            return {
+            response_time = (time.perf_counter_ns() - t0) / 1e9
+            return self._cache_set(cache_key, {
                 "status": "success" if response.status_code == 200 else "error",
-                "data": response.json(),
-                "response_time": response.elapsed.total_seconds()
-            }
+                "data": _json(response),
+                "response_time": response_time
+            })
         except Exception as e:
             return {"status": "error", "error": str(e)}
     
-    def query_governance_logs(self, project_id: str = None, phase_id: str = None, limit: int = 10) -> Dict[str, Any]:
-        """Query governance logs from the local codebase"""
+    def query_governance_logs(self, project_id: str = None, phase_id: str = None, limit: int = 10,
+                              fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Query governance logs from the local codebase; fields limits each entry to those keys"""
         params = {"limit": limit}
         if project_id:
             params["projectId"] = project_id
         if phase_id:
             params["phaseId"] = phase_id
+        if fields:
+            params["fields"] = ",".join(fields)
+        
+        cache_key = ("governance", tuple(sorted(params.items())))
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
             
         try:
             response = self.session.get(f"{self.base_url}/api/governance/query", params=params)
-            return {
+            return self._cache_set(cache_key, {
                 "status": "success" if response.status_code == 200 else "error",
-                "data": response.json(),
+                "data": _json(response),
                 "query_params": params
-            }
+            })
         except Exception as e:
             return {"status": "error", "error": str(e)}
     
@@ -56,16 +158,21 @@ class OpenAIoAppIntegration:
             "query": query,
             "scope": scope,  # governance, memory, combined, agents
             "priority": priority,
-            "projectId": "OF-SDLC-IMP2"
+            "projectId": self.context.project_id
         }
         
+        cache_key = ("rag", query, scope, priority)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
             response = self.session.post(f"{self.base_url}/api/memory/query", json=payload)
-            return {
+            return self._cache_set(cache_key, {
                 "status": "success" if response.status_code == 200 else "error",
-                "data": response.json(),
+                "data": _json(response),
                 "query": query
-            }
+            })
         except Exception as e:
             return {"status": "error", "error": str(e), "query": query}
     
@@ -77,8 +184,8 @@ class OpenAIoAppIntegration:
             "priority": "medium",
             "payload": payload,
             "context": {
-                "projectId": "OF-SDLC-IMP2",
-                "phaseId": "OF-8.8"
+                "projectId": self.context.project_id,
+                "phaseId": self.context.phase_id
             }
         }
         
@@ -86,7 +193,7 @@ class OpenAIoAppIntegration:
             response = self.session.post(f"{self.base_url}/api/agent/execute", json=request_payload)
             return {
                 "status": "success" if response.status_code == 200 else "error",
-                "data": response.json(),
+                "data": _json(response),
                 "agent_id": agent_id,
                 "task_type": task_type
             }
@@ -95,45 +202,97 @@ class OpenAIoAppIntegration:
     
     def log_openai_interaction(self, message: str, metadata: Dict[str, Any] = None) -> Dict[str, Any]:
         """Log OpenAI interaction for governance tracking"""
+        if not metadata:
+            metadata = {
+                "timestamp": datetime.fromtimestamp(time.time_ns() / 1e9).isoformat(),
+                "integration_type": "openai_direct",
+                "session_id": self.context.session_id
+            }
         payload = {
             "source": "azure_openai",
             "level": "info",
             "message": message,
-            "metadata": metadata or {
-                "timestamp": datetime.now().isoformat(),
-                "integration_type": "openai_direct",
-                "session_id": f"openai_{int(time.time())}"
-            }
+            "metadata": metadata
         }
         
         try:
             response = self.session.post(f"{self.base_url}/api/telemetry/log", json=payload)
             return {
                 "status": "success" if response.status_code == 200 else "error",
-                "data": response.json()
+                "data": _json(response)
             }
         except Exception as e:
             return {"status": "error", "error": str(e)}
     
-    def add_governance_entry(self, entry_type: str, project_id: str, summary: str, details: Dict[str, Any]) -> Dict[str, Any]:
-        """Add a new governance log entry"""
-        payload = {
+    def _governance_payload(self, entry_type: str, project_id: str, summary: str, details: Dict[str, Any]) -> Dict[str, Any]:
+        return {
             "entryType": entry_type,
             "projectId": project_id,
-            "phaseId": "OF-8.8",
+            "phaseId": self.context.phase_id,
             "summary": summary,
             "details": details,
-            "memoryAnchor": f"openai-interaction-{int(time.time())}"
+            "memoryAnchor": f"openai-interaction-{_unix_seconds(time.time_ns())}"
         }
+    
+    def add_governance_entry(self, entry_type: str, project_id: str, summary: str, details: Dict[str, Any]) -> Dict[str, Any]:
+        """Add a new governance log entry"""
+        payload = self._governance_payload(entry_type, project_id, summary, details)
         
         try:
             response = self.session.post(f"{self.base_url}/api/governance/append", json=payload)
             return {
                 "status": "success" if response.status_code == 200 else "error",
-                "data": response.json()
+                "data": _json(response)
             }
         except Exception as e:
             return {"status": "error", "error": str(e)}
+        finally:
+            # Even a failed request may have been written, so drop cached queries either way
+            self._invalidate_governance_queries()
+    
+    def bulk_append(self, entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Add several governance entries (entryType/projectId/summary/... dicts) in one request"""
+        body = orjson.dumps(entries) if orjson is not None else json.dumps(entries)
+        
+        try:
+            response = self.session.post(f"{self.base_url}/api/governance/bulk", data=body)
+            return {
+                "status": "success" if response.status_code == 200 else "error",
+                "data": _json(response),
+                "count": len(entries)
+            }
+        except Exception as e:
+            return {"status": "error", "error": str(e), "count": len(entries)}
+        finally:
+            self._invalidate_governance_queries()
+    
+    def queue_governance_entry(self, entry_type: str, project_id: str, summary: str, details: Dict[str, Any]) -> Dict[str, Any]:
+        """Buffer a governance entry for the next bulk append; flushes once flush_threshold are pending"""
+        with self._buffer_lock:
+            self._governance_buffer.append(self._governance_payload(entry_type, project_id, summary, details))
+            pending = len(self._governance_buffer)
+        if pending >= self.flush_threshold:
+            return self.flush()
+        return {"status": "queued", "pending": pending}
+    
+    def flush(self) -> Dict[str, Any]:
+        """Send every buffered governance entry in one bulk append"""
+        with self._buffer_lock:
+            entries, self._governance_buffer = self._governance_buffer, []
+        if not entries:
+            return {"status": "success", "count": 0}
+        return self.bulk_append(entries)
+    
+    def close(self) -> None:
+        """Flush buffered governance entries and release pooled connections"""
+        self.flush()
+        self.session.close()
+    
+    def __enter__(self) -> "OpenAIoAppIntegration":
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
 
 def demonstrate_openai_integration():
     """Demonstrate OpenAI → oApp integration capabilities"""
@@ -141,69 +300,85 @@ def demonstrate_openai_integration():
     print("🤖 OpenAI → oApp Integration Demonstration")
     print("=" * 50)
     
-    # Initialize integration
-    integration = OpenAIoAppIntegration()
-    
-    # 1. Health Check
-    print("\n1️⃣ Health Check")
-    health = integration.health_check()
-    print(f"Status: {health['status']}")
-    if health['status'] == 'success':
-        print(f"Response time: {health['response_time']:.3f}s")
-        print(f"Service status: {health['data']['status']}")
-    
-    # 2. Query Recent Project Activity
-    print("\n2️⃣ Querying Recent Project Activity")
-    governance = integration.query_governance_logs("OF-SDLC-IMP2", limit=5)
-    if governance['status'] == 'success':
-        entries = governance['data']['data']
-        print(f"Found {len(entries)} recent entries:")
-        for entry in entries[:3]:  # Show first 3
-            print(f"  • {entry.get('entry_type', 'N/A')}: {entry.get('summary', 'No summary')[:60]}...")
-    
-    # 3. Execute RAG Query
-    print("\n3️⃣ Executing RAG Query")
-    rag_result = integration.execute_rag_query("What is the current status of the OF Integration Service implementation?")
-    if rag_result['status'] == 'success':
-        answer = rag_result['data'].get('answer', 'No answer received')
-        print(f"RAG Answer: {answer[:200]}...")
-    
-    # 4. Execute Vision Layer Agent
-    print("\n4️⃣ Executing Vision Layer Agent")
-    agent_result = integration.execute_vision_agent(
-        "code-advisor-001",
-        "analysis", 
-        {"analyze": "current project structure and health"}
-    )
-    if agent_result['status'] == 'success':
-        result_data = agent_result['data'].get('result', {})
-        print(f"Agent analysis complete: {result_data.get('success', False)}")
-        recommendations = result_data.get('recommendations', [])
-        if recommendations:
-            print(f"Recommendations: {len(recommendations)} items")
-    
-    # 5. Log OpenAI Interaction
-    print("\n5️⃣ Logging OpenAI Interaction")
-    log_result = integration.log_openai_interaction(
-        "OpenAI successfully connected to oApp via OF Integration Service",
-        {"demo": True, "integration_test": True}
-    )
-    print(f"Telemetry logged: {log_result['status']}")
-    
-    # 6. Add Governance Entry
-    print("\n6️⃣ Adding Governance Entry")
-    gov_result = integration.add_governance_entry(
-        "openai_integration_demo",
-        "OF-INTEGRATION",
-        "OpenAI integration demonstration completed successfully",
-        {
-            "demo_steps": 6,
-            "all_endpoints_tested": True,
-            "integration_working": True,
-            "timestamp": datetime.now().isoformat()
-        }
-    )
-    print(f"Governance entry added: {gov_result['status']}")
+    # Initialize integration; leaving the block flushes anything still buffered
+    context = DemoContext()
+    with OpenAIoAppIntegration(context=context) as integration:
+        # 1. Health Check
+        print("\n1️⃣ Health Check")
+        health = integration.health_check()
+        print(f"Status: {health['status']}")
+        if health['status'] == 'success':
+            print(f"Response time: {health['response_time']:.3f}s")
+            print(f"Service status: {health['data']['status']}")
+        
+        # Steps 2-5 are independent, so issue them concurrently; results are
+        # still printed in step order
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            governance_future = executor.submit(
+                integration.query_governance_logs, context.project_id, limit=5, fields=["entry_type", "summary"]
+            )
+            rag_future = executor.submit(
+                integration.execute_rag_query,
+                "What is the current status of the OF Integration Service implementation?"
+            )
+            agent_future = executor.submit(
+                integration.execute_vision_agent,
+                "code-advisor-001",
+                "analysis", 
+                {"analyze": "current project structure and health"}
+            )
+            log_future = executor.submit(
+                integration.log_openai_interaction,
+                "OpenAI successfully connected to oApp via OF Integration Service",
+                {"demo": True, "integration_test": True}
+            )
+        
+        # 2. Query Recent Project Activity
+        print("\n2️⃣ Querying Recent Project Activity")
+        governance = governance_future.result()
+        if governance['status'] == 'success':
+            entries = governance['data']['data']
+            print(f"Found {len(entries)} recent entries:")
+            for entry in entries[:3]:  # Show first 3
+                print(f"  • {entry.get('entry_type', 'N/A')}: {entry.get('summary', 'No summary')[:60]}...")
+        
+        # 3. Execute RAG Query
+        print("\n3️⃣ Executing RAG Query")
+        rag_result = rag_future.result()
+        if rag_result['status'] == 'success':
+            answer = rag_result['data'].get('answer', 'No answer received')
+            print(f"RAG Answer: {answer[:200]}...")
+        
+        # 4. Execute Vision Layer Agent
+        print("\n4️⃣ Executing Vision Layer Agent")
+        agent_result = agent_future.result()
+        if agent_result['status'] == 'success':
+            result_data = agent_result['data'].get('result', {})
+            print(f"Agent analysis complete: {result_data.get('success', False)}")
+            recommendations = result_data.get('recommendations', [])
+            if recommendations:
+                print(f"Recommendations: {len(recommendations)} items")
+        
+        # 5. Log OpenAI Interaction
+        print("\n5️⃣ Logging OpenAI Interaction")
+        log_result = log_future.result()
+        print(f"Telemetry logged: {log_result['status']}")
+        
+        # 6. Add Governance Entry
+        print("\n6️⃣ Adding Governance Entry")
+        integration.queue_governance_entry(
+            "openai_integration_demo",
+            "OF-INTEGRATION",
+            "OpenAI integration demonstration completed successfully",
+            {
+                "demo_steps": 6,
+                "all_endpoints_tested": True,
+                "integration_working": True,
+                "timestamp": datetime.now().isoformat()
+            }
+        )
+        gov_result = integration.flush()
+        print(f"Governance entry added: {gov_result['status']}")
     
     print("\n✅ OpenAI → oApp Integration Demonstration Complete!")
     print("\n📋 Integration Summary:")
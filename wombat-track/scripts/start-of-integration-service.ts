@@ -147,6 +147,7 @@ class OFIntegrationServiceBootstrap {
             'GET /api-docs',
             'GET /api/governance/query',
             'POST /api/governance/append',
+            'POST /api/governance/bulk',
             'POST /api/memory/query',
             'POST /api/agent/execute',
             'POST /api/orchestration/simulate',
@@ -198,6 +199,7 @@ class OFIntegrationServiceBootstrap {
     const endpoints = [
       'GET  /api/governance/query     - Query governance logs',
       'POST /api/governance/append    - Add governance entries', 
+      'POST /api/governance/bulk      - Add governance entries in one batch',
       'POST /api/memory/query         - Execute RAG queries',
       'POST /api/agent/execute        - Run Vision Layer Agents',
       'POST /api/orchestration/simulate - Trigger workflows',
@@ -26,6 +26,7 @@ export interface GovernanceQueryRequest {
     end: string;
   };
   limit?: number;
+  fields?: string | string[];
 }
 
 export interface GovernanceAppendRequest {
@@ -143,6 +144,7 @@ class OFIntegrationService {
     // Protected API endpoints
     this.app.get('/api/governance/query', this.governanceQuery.bind(this));
     this.app.post('/api/governance/append', this.governanceAppend.bind(this));
+    this.app.post('/api/governance/bulk', this.governanceBulkAppend.bind(this));
     this.app.post('/api/memory/query', this.memoryQuery.bind(this));
     this.app.post('/api/agent/execute', this.agentExecute.bind(this));
     this.app.post('/api/orchestration/simulate', this.orchestrationSimulate.bind(this));
@@ -164,6 +166,7 @@ class OFIntegrationService {
           'GET /api-docs',
           'GET /api/governance/query',
           'POST /api/governance/append',
+          'POST /api/governance/bulk',
           'POST /api/memory/query',
           'POST /api/agent/execute',
           'POST /api/orchestration/simulate',
@@ -259,7 +262,7 @@ class OFIntegrationService {
         'GET /api/governance/query': {
           description: 'Query governance logs',
           authentication: 'Required',
-          parameters: 'projectId, phaseId, entryType, timeRange, limit',
+          parameters: 'projectId, phaseId, entryType, timeRange, limit, fields',
           response: 'Array of governance entries'
         },
         'POST /api/governance/append': {
@@ -268,6 +271,12 @@ class OFIntegrationService {
           body: 'GovernanceAppendRequest',
           response: 'Success confirmation'
         },
+        'POST /api/governance/bulk': {
+          description: 'Add several governance log entries in one write',
+          authentication: 'Required',
+          body: 'GovernanceAppendRequest[]',
+          response: 'Success confirmation with entry count'
+        },
         'POST /api/memory/query': {
           description: 'Execute RAG query on memory and governance data',
           authentication: 'Required',
@@ -328,6 +337,16 @@ class OFIntegrationService {
         entries = entries.slice(-query.limit);
       }
 
+      // Optional projection: comma-separated entry fields to return. Express parses
+      // repeated ?fields=a&fields=b into an array, so join before splitting
+      if (query.fields) {
+        const fields = ([] as string[]).concat(query.fields).join(',')
+          .split(',').map(field => field.trim()).filter(Boolean);
+        entries = entries.map(entry =>
+          Object.fromEntries(fields.filter(field => field in entry).map(field => [field, entry[field]]))
+        );
+      }
+
       // Log this access
       await this.logToGovernance({
         entryType: 'integration_access',
@@ -372,19 +391,7 @@ class OFIntegrationService {
       }
 
       // Create governance entry
-      const entry = {
-        timestamp: new Date().toISOString(),
-        entry_type: appendReq.entryType,
-        project_id: appendReq.projectId,
-        phase_id: appendReq.phaseId,
-        memory_anchor: appendReq.memoryAnchor,
-        summary: appendReq.summary,
-        details: appendReq.details,
-        agent_id: appendReq.agentId,
-        client_id: req.user?.clientId,
-        integration_source: 'azure_openai',
-        audit_traceability: true
-      };
+      const entry = this.buildGovernanceEntry(appendReq, req);
 
       // Append to governance log
       const governanceLogPath = path.join(process.cwd(), 'logs', 'governance.jsonl');
@@ -408,6 +415,70 @@ class OFIntegrationService {
     }
   }
 
+  private async governanceBulkAppend(req: AuthenticatedRequest, res: Response): Promise<void> {
+    try {
+      const appendReqs: GovernanceAppendRequest[] = req.body;
+
+      if (!Array.isArray(appendReqs) || appendReqs.length === 0) {
+        return res.status(400).json({
+          success: false,
+          error: 'Body must be a non-empty array of governance entries',
+          requestId: req.requestId
+        });
+      }
+
+      // Reject the whole batch if any entry is incomplete, so nothing is half-written
+      const invalid = appendReqs
+        .map((appendReq, index) => (!appendReq?.entryType || !appendReq.projectId || !appendReq.summary ? index : -1))
+        .filter(index => index !== -1);
+      if (invalid.length > 0) {
+        return res.status(400).json({
+          success: false,
+          error: 'Missing required fields: entryType, projectId, summary',
+          invalidIndexes: invalid,
+          requestId: req.requestId
+        });
+      }
+
+      // One append for the whole batch
+      const entries = appendReqs.map(appendReq => this.buildGovernanceEntry(appendReq, req));
+      const governanceLogPath = path.join(process.cwd(), 'logs', 'governance.jsonl');
+      await fs.appendFile(governanceLogPath, entries.map(entry => JSON.stringify(entry) + '\n').join(''));
+
+      res.json({
+        success: true,
+        message: 'Governance entries added successfully',
+        count: entries.length,
+        requestId: req.requestId,
+        timestamp: new Date().toISOString()
+      });
+
+    } catch (error: any) {
+      console.error('Governance bulk append error:', error);
+      res.status(500).json({
+        success: false,
+        error: 'Failed to append governance entries',
+        requestId: req.requestId
+      });
+    }
+  }
+
+  private buildGovernanceEntry(appendReq: GovernanceAppendRequest, req: AuthenticatedRequest) {
+    return {
+      timestamp: new Date().toISOString(),
+      entry_type: appendReq.entryType,
+      project_id: appendReq.projectId,
+      phase_id: appendReq.phaseId,
+      memory_anchor: appendReq.memoryAnchor,
+      summary: appendReq.summary,
+      details: appendReq.details,
+      agent_id: appendReq.agentId,
+      client_id: req.user?.clientId,
+      integration_source: 'azure_openai',
+      audit_traceability: true
+    };
+  }
+
   private async memoryQuery(req: AuthenticatedRequest, res: Response): Promise<void> {
     try {
       const queryReq: MemoryQueryRequest = req.body;
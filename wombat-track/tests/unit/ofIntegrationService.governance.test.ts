@@ -0,0 +1,216 @@
+/**
+ * Unit Tests for OF Integration Service governance endpoints
+ * Query filtering, field projection and bulk append over logs/governance.jsonl
+ */
+
+import fs from 'fs/promises';
+import OFIntegrationService from '../../src/services/ofIntegrationService';
+
+// Mock dependencies
+jest.mock('fs/promises', () => ({
+  __esModule: true,
+  default: {
+    readFile: jest.fn(),
+    appendFile: jest.fn()
+  }
+}));
+jest.mock('../../src/services/ofIntegrationAuth', () => ({
+  createOFIntegrationAuth: jest.fn(() => ({
+    authenticate: () => (_req: any, _res: any, next: () => void) => next()
+  }))
+}));
+jest.mock('../../src/services/ragGovernanceService', () => ({ ragGovernanceService: {} }));
+jest.mock('../../src/services/visionLayerAgent', () => ({ visionLayerAgentFramework: {} }));
+jest.mock('../../src/services/agenticCloudOrchestrator', () => ({ agenticCloudOrchestrator: {} }));
+jest.mock('../../src/services/enhancedGovernanceLogger', () => ({ enhancedGovernanceLogger: {} }));
+
+const mockFs = fs as jest.Mocked<typeof fs>;
+
+const mockResponse = () => {
+  const res: any = {};
+  res.status = jest.fn(() => res);
+  res.json = jest.fn(() => res);
+  return res;
+};
+
+const mockRequest = (overrides: Record<string, unknown> = {}): any => ({
+  query: {},
+  body: undefined,
+  requestId: 'req_test_1',
+  user: { clientId: 'test-client' },
+  ...overrides
+});
+
+describe('OFIntegrationService governance endpoints', () => {
+  let service: any;
+
+  const governanceLog = [
+    {
+      timestamp: '2025-08-02T10:00:00Z',
+      entry_type: 'Decision',
+      project_id: 'OF-SDLC',
+      phase_id: 'OF-1.1',
+      summary: 'Adopt canonical tables',
+      details: { reviewer: 'ops' }
+    },
+    {
+      timestamp: '2025-08-02T11:00:00Z',
+      entry_type: 'Change',
+      project_id: 'OF-SDLC',
+      phase_id: 'OF-1.2',
+      summary: 'Backfill phases',
+      details: { rows: 38 }
+    },
+    {
+      timestamp: '2025-08-02T12:00:00Z',
+      entry_type: 'Change',
+      project_id: 'WT-UX',
+      summary: 'Unrelated project',
+      details: {}
+    }
+  ].map(entry => JSON.stringify(entry)).join('\n') + '\n';
+
+  beforeEach(() => {
+    jest.clearAllMocks();
+    jest.spyOn(console, 'log').mockImplementation(() => {});
+    jest.spyOn(console, 'error').mockImplementation(() => {});
+    mockFs.readFile.mockResolvedValue(governanceLog as any);
+    mockFs.appendFile.mockResolvedValue(undefined);
+    service = new OFIntegrationService({} as any);
+  });
+
+  afterEach(() => {
+    jest.restoreAllMocks();
+  });
+
+  describe('governanceQuery', () => {
+    it('should return full entries when no fields are requested', async () => {
+      const res = mockResponse();
+      await service.governanceQuery(mockRequest({ query: { projectId: 'OF-SDLC' } }), res);
+
+      const body = res.json.mock.calls[0][0];
+      expect(body.success).toBe(true);
+      expect(body.count).toBe(2);
+      expect(body.data[0]).toHaveProperty('details', { reviewer: 'ops' });
+    });
+
+    it('should project entries onto the requested fields', async () => {
+      const res = mockResponse();
+      await service.governanceQuery(
+        mockRequest({ query: { projectId: 'OF-SDLC', fields: 'timestamp, summary' } }),
+        res
+      );
+
+      const body = res.json.mock.calls[0][0];
+      expect(body.count).toBe(2);
+      expect(body.data).toEqual([
+        { timestamp: '2025-08-02T10:00:00Z', summary: 'Adopt canonical tables' },
+        { timestamp: '2025-08-02T11:00:00Z', summary: 'Backfill phases' }
+      ]);
+    });
+
+    it('should skip requested fields an entry does not have', async () => {
+      const res = mockResponse();
+      await service.governanceQuery(mockRequest({ query: { fields: 'project_id,phase_id,' } }), res);
+
+      const body = res.json.mock.calls[0][0];
+      expect(body.data[2]).toEqual({ project_id: 'WT-UX' });
+    });
+
+    it('should accept repeated fields parameters', async () => {
+      const res = mockResponse();
+      // ?fields=timestamp&fields=summary,entry_type as parsed by Express
+      await service.governanceQuery(
+        mockRequest({ query: { projectId: 'OF-SDLC', fields: ['timestamp', 'summary,entry_type'] } }),
+        res
+      );
+
+      expect(res.status).not.toHaveBeenCalled();
+      const body = res.json.mock.calls[0][0];
+      expect(body.data).toEqual([
+        { timestamp: '2025-08-02T10:00:00Z', summary: 'Adopt canonical tables', entry_type: 'Decision' },
+        { timestamp: '2025-08-02T11:00:00Z', summary: 'Backfill phases', entry_type: 'Change' }
+      ]);
+    });
+
+    it('should apply the limit before projecting', async () => {
+      const res = mockResponse();
+      await service.governanceQuery(mockRequest({ query: { limit: 1, fields: 'summary' } }), res);
+
+      const body = res.json.mock.calls[0][0];
+      expect(body.data).toEqual([{ summary: 'Unrelated project' }]);
+    });
+
+    it('should return 500 when the governance log cannot be read', async () => {
+      mockFs.readFile.mockRejectedValueOnce(new Error('ENOENT'));
+      const res = mockResponse();
+      await service.governanceQuery(mockRequest(), res);
+
+      expect(res.status).toHaveBeenCalledWith(500);
+      expect(res.json.mock.calls[0][0].success).toBe(false);
+    });
+  });
+
+  describe('governanceBulkAppend', () => {
+    const entry = (summary: string) => ({
+      entryType: 'Change',
+      projectId: 'OF-SDLC',
+      phaseId: 'OF-1.2',
+      summary,
+      details: { source: 'test' }
+    });
+
+    it.each([
+      ['a non-array body', entry('single')],
+      ['an empty array', []],
+      ['no body', undefined]
+    ])('should reject %s with 400', async (_label, body) => {
+      const res = mockResponse();
+      await service.governanceBulkAppend(mockRequest({ body }), res);
+
+      expect(res.status).toHaveBeenCalledWith(400);
+      expect(res.json.mock.calls[0][0].success).toBe(false);
+      expect(mockFs.appendFile).not.toHaveBeenCalled();
+    });
+
+    it('should reject the whole batch and report incomplete entries', async () => {
+      const res = mockResponse();
+      const body = [entry('first'), { entryType: 'Change', projectId: 'OF-SDLC' }, entry('third'), null];
+      await service.governanceBulkAppend(mockRequest({ body }), res);
+
+      expect(res.status).toHaveBeenCalledWith(400);
+      expect(res.json.mock.calls[0][0].invalidIndexes).toEqual([1, 3]);
+      expect(mockFs.appendFile).not.toHaveBeenCalled();
+    });
+
+    it('should write every entry in a single append', async () => {
+      const res = mockResponse();
+      await service.governanceBulkAppend(mockRequest({ body: [entry('first'), entry('second')] }), res);
+
+      expect(mockFs.appendFile).toHaveBeenCalledTimes(1);
+      const [logPath, data] = mockFs.appendFile.mock.calls[0];
+      expect(String(logPath)).toMatch(/logs[\\/]governance\.jsonl$/);
+
+      const lines = String(data).split('\n');
+      expect(lines.pop()).toBe('');
+      expect(lines.map(line => JSON.parse(line))).toEqual([
+        expect.objectContaining({ entry_type: 'Change', project_id: 'OF-SDLC', summary: 'first', client_id: 'test-client' }),
+        expect.objectContaining({ entry_type: 'Change', project_id: 'OF-SDLC', summary: 'second', client_id: 'test-client' })
+      ]);
+
+      const body = res.json.mock.calls[0][0];
+      expect(body.success).toBe(true);
+      expect(body.count).toBe(2);
+      expect(body.requestId).toBe('req_test_1');
+    });
+
+    it('should return 500 when the append fails', async () => {
+      mockFs.appendFile.mockRejectedValueOnce(new Error('EACCES'));
+      const res = mockResponse();
+      await service.governanceBulkAppend(mockRequest({ body: [entry('first')] }), res);
+
+      expect(res.status).toHaveBeenCalledWith(500);
+      expect(res.json.mock.calls[0][0].success).toBe(false);
+    });
+  });
+});